@@ -0,0 +1,193 @@
+"""Load test every MADR endpoint against a local uvicorn.
+
+python -m benchmarks --requests 500 --concurrency 20 -o bench.json
+python -m benchmarks compare old.json new.json
+python -m benchmarks micro [--save]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASELINES = Path(__file__).parent / 'baselines'
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--novelists', type=int, default=1_000)
+    parser.add_argument('--books', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bcrypt-rounds', type=int, default=12)
+    parser.add_argument(
+        '--database-url',
+        help='Database to benchmark against. ITS TABLES ARE DROPPED AND '
+        'RECREATED. Defaults to a temporary SQLite file.',
+    )
+    parser.add_argument(
+        '--only',
+        action='append',
+        help='Run only scenarios whose name contains this text.',
+    )
+    parser.add_argument(
+        '-o', '--output', type=Path, default=Path('bench.json')
+    )
+    return parser
+
+
+def compare_main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks compare')
+    parser.add_argument('baseline', type=Path)
+    parser.add_argument('current', type=Path)
+    args = parser.parse_args(argv)
+
+    from benchmarks.stats import compare
+
+    rows = compare(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+    )
+    print(f'{"route":40} {"p95 ms":>21} {"Δ%":>8} {"req/s":>21} {"Δ%":>8}')
+    for row in rows:
+        p95_old, p95_new = row['p95_ms']
+        rps_old, rps_new = row['rps']
+        print(
+            f'{row["route"]:40} {p95_old:>10.2f}→{p95_new:<10.2f} '
+            f'{row["p95_change"]:>+8.1f} {rps_old:>10.1f}→{rps_new:<10.1f} '
+            f'{row["rps_change"]:>+8.1f}'
+        )
+
+
+def micro_main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks micro')
+    parser.add_argument(
+        '--baseline', type=Path, default=BASELINES / 'micro.json'
+    )
+    parser.add_argument(
+        '--save',
+        action='store_true',
+        help='Store the results as the new baseline.',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help='Allowed slowdown over the baseline (0.25 = 25%%).',
+    )
+    parser.add_argument('--only', action='append')
+    args = parser.parse_args(argv)
+    os.environ.setdefault('AUTH_SECRET_KEY', secrets.token_urlsafe(32))
+
+    from benchmarks.micro import build_cases, find_regressions, measure
+
+    results = {}
+    for case in build_cases():
+        if args.only and not any(name in case.name for name in args.only):
+            continue
+        results[case.name] = round(measure(case.func), 9)
+        print(f'{case.name:45} {results[case.name] * 1e6:>14.2f} µs')
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(results, indent=2, sort_keys=True) + '\n'
+        )
+        print(f'Baseline written to {args.baseline}', file=sys.stderr)
+        return
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}', file=sys.stderr)
+        return
+    regressions = find_regressions(
+        json.loads(args.baseline.read_text()), results, args.threshold
+    )
+    for name, slowdown in regressions.items():
+        print(f'REGRESSION {name}: {slowdown:+.1%}', file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'compare':
+        return compare_main(argv[1:])
+    if argv and argv[0] == 'micro':
+        return micro_main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    tmpdir = tempfile.TemporaryDirectory(prefix='madr-bench-')
+    database_url = (
+        args.database_url or f'sqlite:///{Path(tmpdir.name) / "bench.sqlite3"}'
+    )
+    # madr reads its configuration at import time, so the environment shared
+    # with the server has to be in place before anything from madr is loaded.
+    env = {
+        'DATABASE_URL': database_url,
+        'AUTH_SECRET_KEY': secrets.token_urlsafe(32),
+        'AUTH_BCRYPT_ROUNDS': str(args.bcrypt_rounds),
+        'WEB_CONCURRENCY': str(args.workers),
+    }
+    os.environ.update(env)
+    os.environ.pop('AUTH_KEYS_FILE', None)
+
+    from benchmarks.runner import run_scenarios, start_server, stop_server
+    from benchmarks.seed import seed_catalog
+
+    disposable = args.requests
+    print('Seeding catalog...', file=sys.stderr)
+    catalog = seed_catalog(
+        database_url, args.users, args.novelists, args.books, disposable
+    )
+    server = start_server(args.host, args.port, args.workers, env)
+    try:
+        routes = asyncio.run(
+            run_scenarios(
+                f'http://{args.host}:{args.port}',
+                catalog,
+                args.requests,
+                args.concurrency,
+                args.only,
+            )
+        )
+    finally:
+        stop_server(server)
+        tmpdir.cleanup()
+
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'created_at': datetime.now(tz=timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': database_url.split(':', 1)[0],
+            'users': args.users,
+            'novelists': args.novelists,
+            'books': args.books,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'bcrypt_rounds': args.bcrypt_rounds,
+        },
+        'routes': routes,
+    }
+    args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+    print(f'Report written to {args.output}', file=sys.stderr)
@@ -0,0 +1,111 @@
+import timeit
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from madr.server.responses import model_response
+from madr.server.schemas.books import GetManyBooksResponseSchema
+from madr.server.services.book_service import BookRecord
+from madr.tools import hash, sanitize, security
+
+SCHEMA_SIZES = (20, 100, 1000)
+
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[], object]
+
+
+def _books_payload(size: int) -> dict:
+    return {
+        'livros': [
+            {
+                'id': n,
+                'ano': 1900 + n % 120,
+                'titulo': f'livro {n} memorias postumas',
+                'romancista_id': n % 50 + 1,
+            }
+            for n in range(size)
+        ]
+    }
+
+
+def build_cases() -> list[Case]:
+    hashed = hash.hash_pwd('benchmark')
+    token = security.create_access_token({'sub': 'leitor@madr.com'})
+    cases = [
+        Case(
+            'sanitize_str.short',
+            lambda: sanitize.sanitize_str('Memórias Póstumas de Brás Cubas!'),
+        ),
+        Case(
+            'sanitize_str.long',
+            lambda: sanitize.sanitize_str(
+                '  O   Mundo Assombrado pelos Demônios: a ciência vista '
+                'como uma vela no escuro...  ' * 4
+            ),
+        ),
+        Case('hash_pwd', lambda: hash.hash_pwd('benchmark')),
+        Case('check_pwd', lambda: hash.check_pwd('benchmark', hashed)),
+        Case(
+            'create_access_token',
+            lambda: security.create_access_token({'sub': 'leitor@madr.com'}),
+        ),
+        Case(
+            'get_payload_from_token',
+            lambda: security.get_payload_from_token(token),
+        ),
+    ]
+    updated_at = datetime(2024, 7, 1)
+    for size in SCHEMA_SIZES:
+        payload = _books_payload(size)
+        model = GetManyBooksResponseSchema.model_validate(payload)
+        records = {
+            'livros': [
+                BookRecord(n, f'livro {n}', '1900', n % 50 + 1, updated_at)
+                for n in range(size)
+            ],
+            'next_cursor': None,
+        }
+        cases += [
+            Case(
+                f'GetManyBooksResponseSchema.validate.{size}',
+                lambda payload=payload: (
+                    GetManyBooksResponseSchema.model_validate(payload)
+                ),
+            ),
+            Case(
+                f'GetManyBooksResponseSchema.serialize.{size}',
+                lambda model=model: model.model_dump_json(by_alias=True),
+            ),
+            Case(
+                f'model_response.books.{size}',
+                lambda records=records: model_response(
+                    GetManyBooksResponseSchema, records
+                ).body,
+            ),
+        ]
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> float:
+    """Best seconds per call over ``repeat`` runs of at least 0.2s each."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def find_regressions(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> dict[str, float]:
+    """Cases slower than ``baseline`` by more than ``threshold`` (0.25 = 25%).
+
+    Returns the relative slowdown of each regressed case.
+    """
+    regressions = {}
+    for name, seconds in current.items():
+        old = baseline.get(name)
+        if old and seconds > old * (1 + threshold):
+            regressions[name] = seconds / old - 1
+    return regressions
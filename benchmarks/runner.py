@@ -0,0 +1,316 @@
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import httpx
+
+from benchmarks.seed import PASSWORD, WORDS, Catalog
+from benchmarks.stats import summarize
+from madr.tools.security import create_access_token
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    expected_status: int
+    build: Callable[[int], tuple[str, dict]]
+    disposable: bool = False
+
+
+@dataclass
+class Context:
+    catalog: Catalog
+    tokens: dict[str, str] = field(default_factory=dict)
+
+    def auth(self, email: str) -> dict:
+        token = self.tokens.get(email)
+        if token is None:
+            token = create_access_token({'sub': email})
+            self.tokens[email] = token
+        return {'Authorization': f'Bearer {token}'}
+
+    def user(self, i: int) -> tuple[int, str]:
+        return self.catalog.users[i % len(self.catalog.users)]
+
+
+def build_scenarios(ctx: Context) -> list[Scenario]:
+    """One scenario per endpoint of the accounts, books and novelists routers.
+
+    Reads run first; writes use unique payloads per request and deletes
+    only consume the disposable rows seeded for them.
+    """
+    catalog = ctx.catalog
+    books = itertools.cycle(catalog.books)
+    novelists = itertools.cycle(catalog.novelists)
+
+    def user_headers(i):
+        return ctx.auth(ctx.user(i)[1])
+
+    return [
+        Scenario(
+            'GET /livros/livro/{id}',
+            'GET',
+            200,
+            lambda i: (f'/livros/livro/{next(books)}', {}),
+        ),
+        Scenario(
+            'GET /livros/livro?titulo',
+            'GET',
+            200,
+            lambda i: (
+                '/livros/livro',
+                {'params': {'titulo': WORDS[i % len(WORDS)]}},
+            ),
+        ),
+        Scenario(
+            'GET /livros/livro?ano',
+            'GET',
+            200,
+            lambda i: ('/livros/livro', {'params': {'ano': 1900 + i % 120}}),
+        ),
+        Scenario(
+            'GET /romancistas/romancista/{id}',
+            'GET',
+            200,
+            lambda i: (f'/romancistas/romancista/{next(novelists)}', {}),
+        ),
+        Scenario(
+            'GET /romancistas/romancista?nome',
+            'GET',
+            200,
+            lambda i: (
+                '/romancistas/romancista',
+                {'params': {'nome': WORDS[i % len(WORDS)]}},
+            ),
+        ),
+        Scenario(
+            'POST /contas/refresh-token',
+            'POST',
+            200,
+            lambda i: ('/contas/refresh-token', {'headers': user_headers(i)}),
+        ),
+        Scenario(
+            'POST /contas/token',
+            'POST',
+            200,
+            lambda i: (
+                '/contas/token',
+                {'data': {'username': ctx.user(i)[1], 'password': PASSWORD}},
+            ),
+        ),
+        Scenario(
+            'POST /contas/conta',
+            'POST',
+            201,
+            lambda i: (
+                '/contas/conta',
+                {
+                    'json': {
+                        'username': f'novo leitor {i}',
+                        'email': f'novo{i}@madr.com',
+                        'senha': PASSWORD,
+                    }
+                },
+            ),
+        ),
+        Scenario(
+            'PUT /contas/conta/{id}',
+            'PUT',
+            200,
+            lambda i: (
+                f'/contas/conta/{ctx.user(i)[0]}',
+                {
+                    'headers': user_headers(i),
+                    'json': {
+                        'username': f'leitor {ctx.user(i)[0]} v{i}',
+                        'email': ctx.user(i)[1],
+                        'senha': PASSWORD,
+                    },
+                },
+            ),
+        ),
+        Scenario(
+            'POST /livros/livro',
+            'POST',
+            201,
+            lambda i: (
+                '/livros/livro',
+                {
+                    'headers': user_headers(i),
+                    'json': {
+                        'ano': 2000,
+                        'titulo': f'livro novo {i}',
+                        'romancista_id': next(novelists),
+                    },
+                },
+            ),
+        ),
+        Scenario(
+            'PATCH /livros/livro/{id}',
+            'PATCH',
+            200,
+            lambda i: (
+                f'/livros/livro/{catalog.books[i % len(catalog.books)]}',
+                {
+                    'headers': user_headers(i),
+                    'json': {
+                        'ano': 2001,
+                        'titulo': f'livro editado {i}',
+                        'romancista_id': next(novelists),
+                    },
+                },
+            ),
+        ),
+        Scenario(
+            'POST /romancistas/romancista',
+            'POST',
+            201,
+            lambda i: (
+                '/romancistas/romancista',
+                {
+                    'headers': user_headers(i),
+                    'json': {'nome': f'romancista novo {i}'},
+                },
+            ),
+        ),
+        Scenario(
+            'PATCH /romancistas/romancista/{id}',
+            'PATCH',
+            200,
+            lambda i: (
+                '/romancistas/romancista/'
+                f'{catalog.novelists[i % len(catalog.novelists)]}',
+                {
+                    'headers': user_headers(i),
+                    'json': {'nome': f'romancista editado {i}'},
+                },
+            ),
+        ),
+        Scenario(
+            'DELETE /livros/livro/{id}',
+            'DELETE',
+            200,
+            lambda i: (
+                f'/livros/livro/{catalog.disposable_books[i]}',
+                {'headers': user_headers(i)},
+            ),
+            disposable=True,
+        ),
+        Scenario(
+            'DELETE /romancistas/romancista/{id}',
+            'DELETE',
+            200,
+            lambda i: (
+                f'/romancistas/romancista/{catalog.disposable_novelists[i]}',
+                {'headers': user_headers(i)},
+            ),
+            disposable=True,
+        ),
+        Scenario(
+            'DELETE /contas/conta/{id}',
+            'DELETE',
+            200,
+            lambda i: (
+                f'/contas/conta/{catalog.disposable_users[i][0]}',
+                {'headers': ctx.auth(catalog.disposable_users[i][1])},
+            ),
+            disposable=True,
+        ),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    latencies: list[float] = []
+    statuses: list[int] = []
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            url, kwargs = scenario.build(i)
+            start = time.perf_counter()
+            response = await client.request(scenario.method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(
+        latencies, statuses, elapsed, scenario.expected_status, concurrency
+    )
+
+
+async def run_scenarios(
+    base_url: str,
+    catalog: Catalog,
+    requests: int,
+    concurrency: int,
+    only: list[str] | None = None,
+) -> dict[str, dict]:
+    ctx = Context(catalog)
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        for scenario in build_scenarios(ctx):
+            if only and not any(name in scenario.name for name in only):
+                continue
+            print(f'-> {scenario.name}', file=sys.stderr)
+            results[scenario.name] = await run_scenario(
+                client, scenario, requests, concurrency
+            )
+    return results
+
+
+def start_server(
+    host: str, port: int, workers: int, env: dict
+) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'uvicorn',
+            'madr:app',
+            '--host',
+            host,
+            '--port',
+            str(port),
+            '--workers',
+            str(workers),
+            '--log-level',
+            'warning',
+            '--no-access-log',
+        ],
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('uvicorn exited before accepting requests')
+        try:
+            httpx.get(f'http://{host}:{port}/docs', timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('uvicorn did not start in 30 seconds')
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
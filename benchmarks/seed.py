@@ -0,0 +1,110 @@
+import itertools
+from dataclasses import dataclass, field
+
+from sqlalchemy import create_engine, insert
+
+from madr.database.models import Book, Novelists, User, table_registry
+from madr.database.search import create_search_indexes
+from madr.tools.hash import hash_pwd
+
+PASSWORD = 'benchmark'
+
+WORDS = [
+    'amor',
+    'casa',
+    'mar',
+    'noite',
+    'sertao',
+    'cidade',
+    'tempo',
+    'memorias',
+    'viagem',
+    'sombra',
+]
+
+
+@dataclass
+class Catalog:
+    users: list[tuple[int, str]] = field(default_factory=list)
+    disposable_users: list[tuple[int, str]] = field(default_factory=list)
+    novelists: list[int] = field(default_factory=list)
+    disposable_novelists: list[int] = field(default_factory=list)
+    books: list[int] = field(default_factory=list)
+    disposable_books: list[int] = field(default_factory=list)
+
+
+def _insert_many(conn, entity, rows: list[dict], returning) -> list:
+    if not rows:
+        return []
+    result = conn.execute(
+        insert(entity).returning(*returning, sort_by_parameter_order=True),
+        rows,
+    )
+    return result.all()
+
+
+def seed_catalog(
+    database_url: str,
+    users: int,
+    novelists: int,
+    books: int,
+    disposable: int,
+) -> Catalog:
+    """Create the schema and fill it with a synthetic catalog.
+
+    ``disposable`` extra users, novelists and books are created only to
+    be consumed by the ``DELETE`` scenarios.
+    """
+    engine = create_engine(database_url)
+    table_registry.metadata.drop_all(engine)
+    table_registry.metadata.create_all(engine)
+    catalog = Catalog()
+    password = hash_pwd(PASSWORD)
+
+    with engine.begin() as conn:
+        create_search_indexes(conn)
+
+        user_rows = [
+            {
+                'username': f'leitor {n}',
+                'email': f'leitor{n}@madr.com',
+                'password': password,
+            }
+            for n in range(users + disposable)
+        ]
+        created = _insert_many(conn, User, user_rows, (User.id, User.email))
+        catalog.users = [tuple(row) for row in created[:users]]
+        catalog.disposable_users = [tuple(row) for row in created[users:]]
+
+        novelist_rows = [
+            {'name': f'romancista {n} {WORDS[n % len(WORDS)]}'}
+            for n in range(novelists)
+        ] + [{'name': f'removivel {n}'} for n in range(disposable)]
+        created = _insert_many(conn, Novelists, novelist_rows, (Novelists.id,))
+        ids = [row.id for row in created]
+        catalog.novelists = ids[:novelists]
+        catalog.disposable_novelists = ids[novelists:]
+
+        authors = itertools.cycle(catalog.novelists or [0])
+        book_rows = [
+            {
+                'title': f'livro {n} {WORDS[n % len(WORDS)]}',
+                'year': str(1900 + n % 120),
+                'author_id': next(authors),
+            }
+            for n in range(books)
+        ] + [
+            {
+                'title': f'removivel {n}',
+                'year': '2000',
+                'author_id': next(authors),
+            }
+            for n in range(disposable)
+        ]
+        created = _insert_many(conn, Book, book_rows, (Book.id,))
+        ids = [row.id for row in created]
+        catalog.books = ids[:books]
+        catalog.disposable_books = ids[books:]
+
+    engine.dispose()
+    return catalog
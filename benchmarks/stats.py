@@ -0,0 +1,64 @@
+import math
+from collections import Counter
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(
+    latencies: list[float],
+    statuses: list[int],
+    elapsed: float,
+    expected_status: int,
+    concurrency: int,
+) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        'requests': count,
+        'concurrency': concurrency,
+        'errors': sum(status != expected_status for status in statuses),
+        'status_codes': {
+            str(code): total
+            for code, total in sorted(Counter(statuses).items())
+        },
+        'rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(ordered) / count * 1000, 3) if count else 0.0,
+            'p50': round(percentile(ordered, 50) * 1000, 3),
+            'p95': round(percentile(ordered, 95) * 1000, 3),
+            'p99': round(percentile(ordered, 99) * 1000, 3),
+            'max': round(ordered[-1] * 1000, 3) if count else 0.0,
+        },
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[dict]:
+    """Per route change of p95 latency and requests/sec between reports."""
+    rows = []
+    for route, stats in current['routes'].items():
+        old = baseline['routes'].get(route)
+        if not old:
+            continue
+        old_p95, new_p95 = old['latency_ms']['p95'], stats['latency_ms']['p95']
+        rows.append(
+            {
+                'route': route,
+                'p95_ms': (old_p95, new_p95),
+                'p95_change': _change(old_p95, new_p95),
+                'rps': (old['rps'], stats['rps']),
+                'rps_change': _change(old['rps'], stats['rps']),
+            }
+        )
+    return rows
+
+
+def _change(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return round((new - old) / old * 100, 2)
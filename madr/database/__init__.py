@@ -1 +1 @@
-from .database import get_session
+from .database import get_async_session, get_session, get_session_maker
@@ -1,13 +1,97 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
+from fastapi import Depends
+from sqlalchemy import Insert, create_engine, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session
 
+from madr.database.pool import (
+    ExportedPoolStats,
+    PoolStats,
+    engine_options,
+    listen_pool_events,
+)
+from madr.database.queries import listen_query_events
+from madr.database.slow_queries import SlowQueryLog
 from madr.infra import config
 
-engine = create_engine(config.DATABASE_URL)
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+psycopg',
+    'postgresql+psycopg2': 'postgresql+psycopg',
+}
+
+
+def get_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_session_maker(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def dialect_insert(db: AsyncSession, entity) -> Insert:
+    """``INSERT`` supporting ``on_conflict_do_*`` for the session dialect."""
+    if db.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
+
+
+pool_stats = PoolStats()
+# the async engine serves the API, its pool is the one in /metrics
+async_pool_stats = ExportedPoolStats()
+
+engine = create_engine(
+    config.DATABASE_URL,
+    **engine_options(config.DATABASE_URL, config, pool_stats),
+)
+async_engine = create_async_engine(
+    get_async_url(config.DATABASE_URL),
+    **engine_options(
+        config.DATABASE_URL, config, async_pool_stats, is_async=True
+    ),
+)
+listen_pool_events(engine, pool_stats)
+listen_pool_events(async_engine.sync_engine, async_pool_stats)
+slow_query_log = (
+    SlowQueryLog(
+        config.DATABASE_SLOW_QUERY_MS / 1000,
+        config.DATABASE_SLOW_QUERY_EXPLAIN_RATE,
+    )
+    if config.DATABASE_SLOW_QUERY_MS > 0
+    else None
+)
+listen_query_events(engine, slow_query_log)
+listen_query_events(async_engine, slow_query_log)
+async_session_maker = create_session_maker(async_engine)
 
 
 def get_session() -> Generator[Session, None, None]:  # pragma: no coverage
     with Session(engine) as session:
         yield session
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    return async_session_maker  # pragma: no coverage
+
+
+async def get_async_session(
+    session_maker: async_sessionmaker[AsyncSession] = Depends(
+        get_session_maker
+    ),
+) -> AsyncGenerator[AsyncSession, None]:
+    async with session_maker() as session:
+        yield session
@@ -0,0 +1,82 @@
+"""create search indexes
+
+Revision ID: b41d7c5e2f90
+Revises: 6e9827dc8a01
+Create Date: 2024-07-14 10:12:41.318204
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d7c5e2f90'
+down_revision: Union[str, None] = '6e9827dc8a01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the DDL is copied here, not imported, so this revision never changes
+POSTGRES_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ix_books_title_trgm ON books '
+    'USING gin (title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_novelists_name_trgm ON novelists '
+    'USING gin (name gin_trgm_ops)',
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS ix_books_title_trgm',
+    'DROP INDEX IF EXISTS ix_novelists_name_trgm',
+]
+
+SQLITE_CREATE = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5('
+    "title, content='books', content_rowid='id', tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books '
+    'BEGIN INSERT INTO books_fts(rowid, title) '
+    'VALUES (new.id, new.title); END',
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books '
+    'BEGIN INSERT INTO books_fts(books_fts, rowid, title) '
+    "VALUES ('delete', old.id, old.title); END",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books '
+    'BEGIN INSERT INTO books_fts(books_fts, rowid, title) '
+    "VALUES ('delete', old.id, old.title); "
+    'INSERT INTO books_fts(rowid, title) VALUES (new.id, new.title); END',
+    "INSERT INTO books_fts(books_fts) VALUES ('rebuild')",
+    'CREATE VIRTUAL TABLE IF NOT EXISTS novelists_fts USING fts5('
+    "name, content='novelists', content_rowid='id', tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_ai AFTER INSERT ON novelists '
+    'BEGIN INSERT INTO novelists_fts(rowid, name) '
+    'VALUES (new.id, new.name); END',
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_ad AFTER DELETE ON novelists '
+    'BEGIN INSERT INTO novelists_fts(novelists_fts, rowid, name) '
+    "VALUES ('delete', old.id, old.name); END",
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_au AFTER UPDATE ON novelists '
+    'BEGIN INSERT INTO novelists_fts(novelists_fts, rowid, name) '
+    "VALUES ('delete', old.id, old.name); "
+    'INSERT INTO novelists_fts(rowid, name) VALUES (new.id, new.name); END',
+    "INSERT INTO novelists_fts(novelists_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS books_fts_ai',
+    'DROP TRIGGER IF EXISTS books_fts_ad',
+    'DROP TRIGGER IF EXISTS books_fts_au',
+    'DROP TABLE IF EXISTS books_fts',
+    'DROP TRIGGER IF EXISTS novelists_fts_ai',
+    'DROP TRIGGER IF EXISTS novelists_fts_ad',
+    'DROP TRIGGER IF EXISTS novelists_fts_au',
+    'DROP TABLE IF EXISTS novelists_fts',
+]
+
+
+def _run(statements: dict[str, list[str]]):
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run({'postgresql': POSTGRES_CREATE, 'sqlite': SQLITE_CREATE})
+
+
+def downgrade() -> None:
+    _run({'postgresql': POSTGRES_DROP, 'sqlite': SQLITE_DROP})
@@ -0,0 +1,101 @@
+"""add updated_at to books and novelists
+
+Revision ID: d7a3e1f04c26
+Revises: b41d7c5e2f90
+Create Date: 2024-07-28 16:04:52.771093
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3e1f04c26'
+down_revision: Union[str, None] = 'b41d7c5e2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('books', 'novelists')
+
+# the FTS5 search tables and triggers as of this revision, copied here so
+# that later changes to the app do not change what it does
+SQLITE_CREATE = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5('
+    "title, content='books', content_rowid='id', tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books '
+    'BEGIN INSERT INTO books_fts(rowid, title) '
+    'VALUES (new.id, new.title); END',
+    'CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books '
+    'BEGIN INSERT INTO books_fts(books_fts, rowid, title) '
+    "VALUES ('delete', old.id, old.title); END",
+    'CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE ON books '
+    'BEGIN INSERT INTO books_fts(books_fts, rowid, title) '
+    "VALUES ('delete', old.id, old.title); "
+    'INSERT INTO books_fts(rowid, title) VALUES (new.id, new.title); END',
+    "INSERT INTO books_fts(books_fts) VALUES ('rebuild')",
+    'CREATE VIRTUAL TABLE IF NOT EXISTS novelists_fts USING fts5('
+    "name, content='novelists', content_rowid='id', tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_ai AFTER INSERT ON novelists '
+    'BEGIN INSERT INTO novelists_fts(rowid, name) '
+    'VALUES (new.id, new.name); END',
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_ad AFTER DELETE ON novelists '
+    'BEGIN INSERT INTO novelists_fts(novelists_fts, rowid, name) '
+    "VALUES ('delete', old.id, old.name); END",
+    'CREATE TRIGGER IF NOT EXISTS novelists_fts_au AFTER UPDATE ON novelists '
+    'BEGIN INSERT INTO novelists_fts(novelists_fts, rowid, name) '
+    "VALUES ('delete', old.id, old.name); "
+    'INSERT INTO novelists_fts(rowid, name) VALUES (new.id, new.name); END',
+    "INSERT INTO novelists_fts(novelists_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS books_fts_ai',
+    'DROP TRIGGER IF EXISTS books_fts_ad',
+    'DROP TRIGGER IF EXISTS books_fts_au',
+    'DROP TABLE IF EXISTS books_fts',
+    'DROP TRIGGER IF EXISTS novelists_fts_ai',
+    'DROP TRIGGER IF EXISTS novelists_fts_ad',
+    'DROP TRIGGER IF EXISTS novelists_fts_au',
+    'DROP TABLE IF EXISTS novelists_fts',
+]
+
+
+def _execute_all(statements: list[str]):
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_sqlite = bind.dialect.name == 'sqlite'
+    # SQLite can only add a column with a CURRENT_TIMESTAMP default by
+    # recreating the table, which drops the search triggers with it.
+    if is_sqlite:
+        _execute_all(SQLITE_DROP)
+    for table in TABLES:
+        with op.batch_alter_table(
+            table, recreate='always' if is_sqlite else 'auto'
+        ) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'updated_at',
+                    sa.DateTime(),
+                    server_default=sa.text('(CURRENT_TIMESTAMP)'),
+                    nullable=False,
+                )
+            )
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+    if is_sqlite:
+        _execute_all(SQLITE_CREATE)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    is_sqlite = bind.dialect.name == 'sqlite'
+    if is_sqlite:
+        _execute_all(SQLITE_DROP)
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+    if is_sqlite:
+        _execute_all(SQLITE_CREATE)
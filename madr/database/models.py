@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlalchemy import ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
@@ -6,6 +6,10 @@ from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 table_registry = registry()
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
@@ -34,6 +38,13 @@ class Book:
         init=False,
         server_default=func.now(),
     )
+    # set by Python too, so it keeps microseconds and changes on updates
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False,
+        insert_default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+    )
 
 
 @table_registry.mapped_as_dataclass
@@ -50,3 +61,9 @@ class Novelists:
         init=False,
         server_default=func.now(),
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False,
+        insert_default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+    )
@@ -0,0 +1,168 @@
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import Engine, event, exc, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from madr.infra import Configs
+from madr.infra.metrics import (
+    POOL_CHECKED_OUT,
+    POOL_OVERFLOW,
+    POOL_SIZE,
+    POOL_TIMEOUTS,
+    POOL_WAIT,
+)
+
+
+@dataclass
+class PoolStats:
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    invalidations: int = 0
+    overflow_checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record_wait(self, elapsed: float):
+        self.wait_seconds += elapsed
+        self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def record_timeout(self):
+        self.timeouts += 1
+
+    def record_usage(self, pool: QueuePool):
+        pass
+
+    def snapshot(self, pool: Pool) -> dict:
+        data = asdict(self)
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+            )
+        return data
+
+
+class ExportedPoolStats(PoolStats):
+    """Pool stats that also update the Prometheus metrics as they happen."""
+
+    def record_wait(self, elapsed: float):
+        super().record_wait(elapsed)
+        POOL_WAIT.inc(elapsed)
+
+    def record_timeout(self):
+        super().record_timeout()
+        POOL_TIMEOUTS.inc()
+
+    def record_usage(self, pool: QueuePool):
+        POOL_SIZE.set(pool.size())
+        POOL_CHECKED_OUT.set(pool.checkedout())
+        POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+
+def instrumented_pool(base: type[QueuePool], stats: PoolStats):
+    """Subclass ``base`` to count waits for a connection and the usage.
+
+    Usage is recorded once the pool took or got back a connection, when
+    its own counters are already up to date.
+    """
+
+    class InstrumentedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                stats.record_timeout()
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - start)
+
+        def _do_get(self):
+            record = super()._do_get()
+            stats.record_usage(self)
+            return record
+
+        def _do_return_conn(self, record):
+            super()._do_return_conn(record)
+            stats.record_usage(self)
+
+    return InstrumentedPool
+
+
+def listen_pool_events(engine: Engine, stats: PoolStats):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+        pool = engine.pool
+        if isinstance(pool, QueuePool) and pool.overflow() > 0:
+            stats.overflow_checkouts += 1
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        stats.checkins += 1
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+
+def pool_budget(config: Configs) -> tuple[int, int]:
+    """``(pool_size, max_overflow)`` for one worker process.
+
+    ``DATABASE_MAX_CONNECTIONS`` is shared by every ``WEB_CONCURRENCY``
+    worker, so one worker never opens more than its slice of it. Unset
+    values are derived from that slice, keeping the persistent pool no
+    larger than the threadpool that can hold connections at once.
+    """
+    per_worker = max(
+        1, config.DATABASE_MAX_CONNECTIONS // config.WEB_CONCURRENCY
+    )
+    pool_size = config.DATABASE_POOL_SIZE or min(
+        config.THREADPOOL_SIZE, max(1, per_worker // 2)
+    )
+    max_overflow = config.DATABASE_MAX_OVERFLOW
+    if max_overflow is None:
+        max_overflow = max(0, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def engine_options(
+    url: str, config: Configs, stats: PoolStats, is_async: bool = False
+) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (
+        None,
+        '',
+        ':memory:',
+    ):
+        return {}
+
+    pool_size, max_overflow = pool_budget(config)
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    options = {
+        'poolclass': instrumented_pool(base, stats),
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': config.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': config.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': config.DATABASE_POOL_PRE_PING,
+    }
+    if (
+        parsed.get_backend_name() == 'postgresql'
+        and config.DATABASE_STATEMENT_TIMEOUT_MS
+    ):
+        options['connect_args'] = {
+            'options': (
+                f'-c statement_timeout={config.DATABASE_STATEMENT_TIMEOUT_MS}'
+            )
+        }
+    return options
@@ -0,0 +1,112 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from madr.database.slow_queries import SlowQueryLog
+
+
+@dataclass
+class QueryStats:
+    route: str = ''
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statements run at least ``threshold`` times, a sign of N+1."""
+        if threshold <= 0:
+            return {}
+        return {
+            statement: times
+            for statement, times in self.statements.items()
+            if times >= threshold
+        }
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar(
+    'query_stats', default=None
+)
+
+
+@contextmanager
+def track_queries(route: str = '') -> Iterator[QueryStats]:
+    """Count the statements run by the current context (one request)."""
+    stats = QueryStats(route)
+    reset = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(reset)
+
+
+def _sync_engine(engine: Engine | AsyncEngine) -> Engine:
+    return getattr(engine, 'sync_engine', engine)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    starts = context.connection and context.connection.info.get('query_start')
+    if starts:
+        starts.pop()
+
+
+def listen_query_events(
+    engine: Engine | AsyncEngine, slow_queries: SlowQueryLog | None = None
+):
+    engine = _sync_engine(engine)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        stats = query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if slow_queries is not None:
+            slow_queries.check(
+                conn,
+                statement,
+                parameters,
+                elapsed,
+                executemany,
+                stats.route if stats is not None else '',
+            )
+
+
+@contextmanager
+def count_queries(engine: Engine | AsyncEngine) -> Iterator[QueryStats]:
+    """Count every statement ``engine`` runs inside the block.
+
+    Unlike :func:`track_queries` it is not bound to a context, so it also
+    sees statements issued from other threads, e.g. by a ``TestClient``.
+    """
+    engine = _sync_engine(engine)
+    stats = QueryStats()
+
+    def on_execute(conn, cursor, statement, parameters, context, many):
+        stats.record(statement, 0.0)
+
+    event.listen(engine, 'after_cursor_execute', on_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, 'after_cursor_execute', on_execute)
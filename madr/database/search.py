@@ -0,0 +1,132 @@
+import time
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Connection, column, inspect, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+SEARCH_COLUMNS = {
+    'books': 'title',
+    'novelists': 'name',
+}
+
+# FTS5 trigram tables only index terms with at least three characters.
+MIN_FTS_TERM_SIZE = 3
+
+# a missing FTS table is looked up again after this long, so running the
+# migration does not need a restart to take effect
+FTS_RECHECK_SECONDS = 60
+
+_fts_tables: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def fts_table_name(table_name: str) -> str:
+    return f'{table_name}_fts'
+
+
+def _sqlite_fts_ddl(table_name: str, column_name: str) -> list[str]:
+    fts = fts_table_name(table_name)
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+        f"{column_name}, content='{table_name}', content_rowid='id', "
+        "tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} '
+        f'BEGIN INSERT INTO {fts}(rowid, {column_name}) '
+        f'VALUES (new.id, new.{column_name}); END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} '
+        f'BEGIN INSERT INTO {fts}({fts}, rowid, {column_name}) '
+        f"VALUES ('delete', old.id, old.{column_name}); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} '
+        f'BEGIN INSERT INTO {fts}({fts}, rowid, {column_name}) '
+        f"VALUES ('delete', old.id, old.{column_name}); "
+        f'INSERT INTO {fts}(rowid, {column_name}) '
+        f'VALUES (new.id, new.{column_name}); END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(connection: Connection):
+    """Create the substring search indexes for the current dialect.
+
+    Postgres gets a ``pg_trgm`` GIN index that ``LIKE '%term%'`` uses
+    directly; SQLite gets an external content FTS5 trigram table kept in
+    sync by triggers.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        for table_name, column_name in SEARCH_COLUMNS.items():
+            connection.execute(
+                text(
+                    f'CREATE INDEX IF NOT EXISTS '
+                    f'ix_{table_name}_{column_name}_trgm ON {table_name} '
+                    f'USING gin ({column_name} gin_trgm_ops)'
+                )
+            )
+    elif dialect == 'sqlite':
+        for table_name, column_name in SEARCH_COLUMNS.items():
+            for statement in _sqlite_fts_ddl(table_name, column_name):
+                connection.execute(text(statement))
+
+
+def drop_search_indexes(connection: Connection):
+    dialect = connection.dialect.name
+    for table_name, column_name in SEARCH_COLUMNS.items():
+        if dialect == 'postgresql':
+            connection.execute(
+                text(
+                    f'DROP INDEX IF EXISTS ix_{table_name}_{column_name}_trgm'
+                )
+            )
+        elif dialect == 'sqlite':
+            fts = fts_table_name(table_name)
+            for suffix in ('ai', 'ad', 'au'):
+                connection.execute(
+                    text(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+                )
+            connection.execute(text(f'DROP TABLE IF EXISTS {fts}'))
+
+
+async def has_fts_table(db: AsyncSession, table_name: str) -> bool:
+    """Whether the FTS table exists; only a found table is cached for good."""
+    engine = db.get_bind()
+    name = fts_table_name(table_name)
+    tables, checked_at = _fts_tables.get(engine, (set(), None))
+    if name in tables:
+        return True
+    if (
+        checked_at is not None
+        and time.monotonic() - checked_at < FTS_RECHECK_SECONDS
+    ):
+        return False
+    conn = await db.connection()
+    tables = await conn.run_sync(
+        lambda sync_conn: set(inspect(sync_conn).get_table_names())
+    )
+    _fts_tables[engine] = (tables, time.monotonic())
+    return name in tables
+
+
+async def contains(
+    db: AsyncSession, attribute: InstrumentedAttribute, term: str
+) -> ColumnElement[bool]:
+    """``attribute LIKE '%term%'`` routed through the search index.
+
+    On SQLite the match runs against the FTS5 trigram table when it
+    exists; Postgres' trigram index serves the plain ``LIKE``.
+    """
+    pattern = f'%{term}%'
+    table_name = attribute.class_.__tablename__
+    if (
+        db.get_bind().dialect.name == 'sqlite'
+        and len(term) >= MIN_FTS_TERM_SIZE
+        and await has_fts_table(db, table_name)
+    ):
+        fts = table(
+            fts_table_name(table_name), column('rowid'), column(attribute.key)
+        )
+        return attribute.class_.id.in_(
+            select(fts.c.rowid).where(fts.c[attribute.key].like(pattern))
+        )
+    return attribute.like(pattern)
@@ -0,0 +1,89 @@
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+MAX_PARAMETERS_SIZE = 500
+
+
+class SlowQueryLog:
+    """Log statements slower than ``threshold`` seconds.
+
+    A ``explain_rate`` share of the slow ``SELECT`` statements (0 to 1)
+    is logged with its ``EXPLAIN`` plan, run on the same connection.
+    Records go through a queue so the request never waits on the
+    handler's I/O; :meth:`start` and :meth:`stop` run the listener thread.
+    """
+
+    def __init__(self, threshold: float, explain_rate: float = 0.0):
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener: QueueListener | None = None
+
+    def check(self, conn, statement, parameters, elapsed, executemany, route):
+        if elapsed < self.threshold:
+            return
+        plan = None
+        if (
+            not executemany
+            and self.explain_rate
+            and statement.lstrip().upper().startswith(('SELECT', 'WITH'))
+            and random.random() < self.explain_rate
+        ):
+            plan = self.explain(conn, statement, parameters)
+        logger.warning(
+            'Slow query (%.1f ms) on %s: %s\nparameters: %s%s',
+            elapsed * 1000,
+            route or '-',
+            statement,
+            repr(parameters)[:MAX_PARAMETERS_SIZE],
+            f'\nplan:\n{plan}' if plan else '',
+        )
+
+    @staticmethod
+    def explain(conn, statement, parameters) -> str | None:
+        prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if prefix is None:
+            return None
+        # the raw DBAPI cursor keeps EXPLAIN out of the engine events
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+        except Exception as e:  # pragma: no coverage
+            return f'EXPLAIN failed: {e}'
+        finally:
+            cursor.close()
+
+    def start(self, *handlers: logging.Handler):
+        if self._listener is not None:
+            return
+        handler = QueueHandler(self.queue)
+        logger.addHandler(handler)
+        logger.propagate = False
+        self._listener = QueueListener(
+            self.queue,
+            *(handlers or (logging.StreamHandler(),)),
+            respect_handler_level=True,
+        )
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
+        for handler in list(logger.handlers):
+            if isinstance(handler, QueueHandler):
+                logger.removeHandler(handler)
+        logger.propagate = True
@@ -1,9 +1,10 @@
 import logging
+import os
 import random
 import string
 from pathlib import Path
+from typing import Literal
 
-import bcrypt
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,24 +21,75 @@ class Configs(BaseSettings):
 
     ## DATABASE
     DATABASE_URL: str = 'sqlite:///db.sqlite3'
+    DATABASE_MAX_CONNECTIONS: int = 100
+    DATABASE_POOL_SIZE: int | None = None
+    DATABASE_MAX_OVERFLOW: int | None = None
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT_MS: int = 0
+    DATABASE_QUERY_HEADERS: bool = False
+    DATABASE_REPEATED_QUERY_THRESHOLD: int = 10
+    DATABASE_SLOW_QUERY_MS: int = 500
+    DATABASE_SLOW_QUERY_EXPLAIN_RATE: float = 0.0
+
+    ## SERVER
+    WEB_CONCURRENCY: int = 1
+    THREADPOOL_SIZE: int = 40
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_SECONDS: float = 5
+    HTTP_CACHE_CONTROL: str = 'no-cache'
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_MAX_CONCURRENT: int = 4
+    BULK_BATCH_SIZE: int = 1000
+    BULK_MAX_LINE_BYTES: int = 64 * 1024
 
     ## AUTH
     AUTH_SECRET_KEY: str = ''
+    AUTH_KEYS_FILE: Path | None = None
     AUTH_ALGORITHM: str = 'HS256'
     AUTH_JWT_EXPIRES_MINUTES: int = 60
-    AUTH_SALT: str = bcrypt.gensalt().decode()
+    AUTH_BCRYPT_ROUNDS: int = 12
+    AUTH_USER_CACHE_SIZE: int = 1024
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    AUTH_ADMIN_EMAILS: list[str] = []
 
-    @field_validator('AUTH_SALT')
-    def validate_auth_salt(cls, value):  # pragma: no coverage
-        if not value:
-            logging.warning('AUTH_SALT is Empty. Generating new one...')
-            return bcrypt.gensalt().decode()
-        try:
-            bcrypt.checkpw(b'', value.encode())
-            return value
-        except ValueError:
-            logging.warning('Invalid AUTH_SALT. Generating new one...')
-            return bcrypt.gensalt().decode()
+    ## HASH POOL
+    HASH_POOL_WORKERS: int = os.cpu_count() or 1
+    HASH_POOL_MAX_PENDING: int = 64
+
+    ## CACHE
+    CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    CACHE_URL: str = 'redis://localhost:6379/0'
+    CACHE_PREFIX: str = 'madr:'
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_SEARCH_TTL_SECONDS: int = 60
+    CACHE_MAX_SIZE: int = 10_000
+    CACHE_TIMEOUT: float = 0.1
+
+    ## PROFILING
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: Path = BASE_URL / 'profiles'
+
+    ## COMPRESSION
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    @field_validator('AUTH_BCRYPT_ROUNDS')
+    def validate_auth_bcrypt_rounds(cls, value):  # pragma: no coverage
+        if not 4 <= value <= 31:
+            raise ValueError('AUTH_BCRYPT_ROUNDS must be between 4 and 31')
+        return value
+
+    @field_validator('WEB_CONCURRENCY')
+    def validate_web_concurrency(cls, value):
+        if value < 1:
+            raise ValueError('WEB_CONCURRENCY must be at least 1')
+        return value
 
     @staticmethod
     def _gen_secret_key(size: int = 24) -> str:  # pragma: no coverage
@@ -51,6 +103,10 @@ class Configs(BaseSettings):
     @field_validator('AUTH_SECRET_KEY')
     def validate_auth_secret_key(cls, value):  # pragma: no coverage
         if not value:
-            logging.warning('AUTH_SECRET_KEY is Empty. Generating new one...')
+            logging.warning(
+                'AUTH_SECRET_KEY is Empty. Generating new one... '
+                'Tokens will only be accepted by this process, '
+                'set AUTH_KEYS_FILE to share keys between workers.'
+            )
             return cls._gen_secret_key()
         return value
@@ -0,0 +1,80 @@
+"""Prometheus metrics of the API.
+
+Only the declarations live here, so the pool, the hash pool and the cache
+can update their metrics where each event happens without importing the
+server. Counters and ``livesum`` gauges are kept current by every worker
+on its own; ``/metrics`` only renders them.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    'madr_http_request_duration_seconds',
+    'Time to answer a request.',
+    ['method', 'route'],
+)
+RESPONSES = Counter(
+    'madr_http_responses',
+    'Responses sent, by status code.',
+    ['method', 'route', 'status'],
+)
+IN_FLIGHT = Gauge(
+    'madr_http_requests_in_flight',
+    'Requests being handled.',
+    multiprocess_mode='livesum',
+)
+
+POOL_SIZE = Gauge(
+    'madr_db_pool_size',
+    'Persistent connections of the pool.',
+    multiprocess_mode='livesum',
+)
+POOL_CHECKED_OUT = Gauge(
+    'madr_db_pool_checked_out',
+    'Connections in use.',
+    multiprocess_mode='livesum',
+)
+POOL_OVERFLOW = Gauge(
+    'madr_db_pool_overflow',
+    'Connections open beyond the pool size.',
+    multiprocess_mode='livesum',
+)
+POOL_WAIT = Counter(
+    'madr_db_pool_wait_seconds',
+    'Time spent waiting for a pool connection.',
+)
+POOL_TIMEOUTS = Counter(
+    'madr_db_pool_timeouts',
+    'Checkouts that gave up waiting for a connection.',
+)
+
+THREADPOOL_SIZE = Gauge(
+    'madr_threadpool_size',
+    'Threads available to sync endpoints and dependencies.',
+    multiprocess_mode='livesum',
+)
+THREADPOOL_BORROWED = Gauge(
+    'madr_threadpool_borrowed',
+    'Threads in use.',
+    multiprocess_mode='livesum',
+)
+
+BCRYPT_SECONDS = Counter(
+    'madr_bcrypt_seconds',
+    'Time spent hashing and checking passwords.',
+)
+BCRYPT_CALLS = Counter('madr_bcrypt_calls', 'Passwords hashed or checked.')
+BCRYPT_REJECTED = Counter(
+    'madr_bcrypt_rejected',
+    'Calls refused because the hash pool was saturated.',
+)
+BCRYPT_PENDING = Gauge(
+    'madr_bcrypt_pending',
+    'Calls waiting for or running on the hash pool.',
+    multiprocess_mode='livesum',
+)
+
+CACHE_HITS = Counter('madr_cache_hits', 'Record cache lookups answered.')
+CACHE_MISSES = Counter('madr_cache_misses', 'Record cache lookups missed.')
+CACHE_ERRORS = Counter(
+    'madr_cache_errors', 'Cache commands that failed and were skipped.'
+)
@@ -1,9 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+
+from madr.database.database import async_engine, slow_query_log
+from madr.infra import config
+from madr.tools.cache import cache_backend
+from madr.tools.hash import hash_pool
 
+from . import metrics
+from .middlewares import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    QueryCountMiddleware,
+)
+from .profiling import FoldedProfiles
+from .responses import ORJSONResponse
 from .routers import accounts, books, novelists
 
-app = FastAPI()
+profiles = FoldedProfiles(config.PROFILING_DIR)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = config.THREADPOOL_SIZE
+    if slow_query_log is not None:
+        slow_query_log.start()
+    sampler = None
+    if config.METRICS_ENABLED:
+        sampler = asyncio.create_task(
+            metrics.sample_periodically(config.METRICS_SAMPLE_SECONDS)
+        )
+    yield
+    if sampler is not None:
+        sampler.cancel()
+    hash_pool.shutdown()
+    if config.PROFILING_SAMPLE_RATE > 0:
+        profiles.flush()
+    metrics.mark_process_dead()
+    await cache_backend.close()
+    await async_engine.dispose()
+    if slow_query_log is not None:
+        slow_query_log.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(QueryCountMiddleware, config=config)
+app.add_middleware(ProfilerMiddleware, config=config, profiles=profiles)
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, config=config)
 
 app.include_router(accounts.router)
 app.include_router(books.router)
@@ -13,3 +62,13 @@ app.include_router(novelists.router)
 @app.get('/', include_in_schema=False)
 def redirect_to_swagger():
     return RedirectResponse(url='/docs')
+
+
+async def get_metrics():
+    content, media_type = metrics.render_metrics()
+    return Response(content, media_type=media_type)
+
+
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route('/metrics', get_metrics, include_in_schema=False)
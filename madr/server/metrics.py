@@ -0,0 +1,62 @@
+"""Rendering of the Prometheus metrics declared in ``madr.infra.metrics``.
+
+Metric values live in ``prometheus_client``'s per-process storage; when
+``PROMETHEUS_MULTIPROC_DIR`` is set every uvicorn worker writes to its
+own memory-mapped files there and ``/metrics`` aggregates all of them.
+"""
+import asyncio
+import os
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+
+from madr.infra.metrics import (
+    REQUEST_LATENCY,
+    RESPONSES,
+    THREADPOOL_BORROWED,
+    THREADPOOL_SIZE,
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    REQUEST_LATENCY.labels(method, route).observe(seconds)
+    RESPONSES.labels(method, route, str(status)).inc()
+
+
+def sample_threadpool():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+    THREADPOOL_BORROWED.set(limiter.borrowed_tokens)
+
+
+async def sample_periodically(interval: float):
+    """Keep the values without events of their own fresh in this worker.
+
+    Runs in every worker, since a scrape only reaches one of them.
+    """
+    while True:
+        sample_threadpool()
+        await asyncio.sleep(interval)
+
+
+def is_multiprocess() -> bool:
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+def render_metrics() -> tuple[bytes, str]:
+    registry = REGISTRY
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,4 @@
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware
+from .profiler import ProfilerMiddleware
+from .queries import QueryCountMiddleware
@@ -0,0 +1,189 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from madr.infra import Configs
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+
+class GzipCompressor:
+    def __init__(self, config: Configs):
+        self._compressor = zlib.compressobj(
+            config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, config: Configs):
+        self._compressor = brotli.Compressor(
+            quality=config.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, config: Configs):
+        self._compressor = zstandard.ZstdCompressor(
+            level=config.COMPRESSION_ZSTD_LEVEL
+        ).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> dict[str, type]:
+    """Encodings this process can produce, the preferred one first."""
+    encodings = {}
+    if zstandard is not None:
+        encodings['zstd'] = ZstdCompressor
+    if brotli is not None:
+        encodings['br'] = BrotliCompressor
+    encodings['gzip'] = GzipCompressor
+    return encodings
+
+
+def negotiate(accept_encoding: str, encodings: dict[str, type]) -> str | None:
+    """Pick the encoding with the highest ``q``, ties by our preference."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with zstd, brotli or gzip per ``Accept-Encoding``.
+
+    Whole bodies under ``COMPRESSION_MINIMUM_SIZE`` go out as they are,
+    and so do responses marked ``Cache-Control: no-transform``. Streamed
+    bodies are compressed chunk by chunk and flushed after each one, so
+    nothing is buffered and clients see data as it is produced. ETags
+    are left as they are: compressed responses and 304s carry ``Vary:
+    Accept-Encoding``, so a revalidation gets back the stored validator.
+    brotli and zstd are used only when their packages are installed.
+    """
+
+    def __init__(self, app: ASGIApp, config: Configs):
+        self.app = app
+        self.config = config
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        encoding = negotiate(
+            Headers(scope=scope).get('accept-encoding', ''), self.encodings
+        )
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: Message | None = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body' or start is None:
+                return await send(message)
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                if start['status'] == 304:
+                    # validates a body that may have been compressed
+                    headers.add_vary_header('Accept-Encoding')
+                if not self.should_compress(headers, body, more_body):
+                    await send(start)
+                    await send(message)
+                    start = None
+                    return
+                compressor = self.encodings[encoding](self.config)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers['Content-Length'] = str(len(body))
+                    await send(start)
+                    await send({'type': 'http.response.body', 'body': body})
+                    return
+                await send(start)
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            await send(
+                {
+                    'type': 'http.response.body',
+                    'body': data,
+                    'more_body': more_body,
+                }
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+    def should_compress(
+        self, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        if 'content-encoding' in headers:
+            return False
+        if 'no-transform' in headers.get('cache-control', '').lower():
+            return False
+        if not headers.get('content-type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        return more_body or len(body) >= self.config.COMPRESSION_MINIMUM_SIZE
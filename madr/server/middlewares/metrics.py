@@ -0,0 +1,43 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from madr.infra.metrics import IN_FLIGHT
+from madr.server.metrics import observe_request
+
+
+class MetricsMiddleware:
+    """Record latency, status and in-flight requests per route.
+
+    Requests that match no route share the ``unmatched`` label so stray
+    URLs cannot blow up the number of series.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get('route')
+            observe_request(
+                scope['method'],
+                getattr(route, 'path', 'unmatched'),
+                status,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,79 @@
+import random
+
+from pyinstrument import Profiler
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from madr.infra import Configs
+from madr.server.profiling import (
+    FoldedProfiles,
+    is_admin,
+    render_profile,
+    requested_output,
+)
+
+
+class ProfilerMiddleware:
+    """Profile admin requests on demand and a sample of all requests.
+
+    A profiled-on-demand request answers with the profile; its original
+    status goes in the ``X-Profiled-Status`` header.
+    """
+
+    def __init__(
+        self, app: ASGIApp, config: Configs, profiles: FoldedProfiles
+    ):
+        self.app = app
+        self.config = config
+        self.profiles = profiles
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        if self.config.AUTH_ADMIN_EMAILS:
+            headers = Headers(scope=scope)
+            output = requested_output(scope, headers)
+            if output and is_admin(headers, self.config):
+                return await self.profile_request(output, scope, receive, send)
+        if random.random() < self.config.PROFILING_SAMPLE_RATE:
+            return await self.sample_request(scope, receive, send)
+        await self.app(scope, receive, send)
+
+    async def profile_request(
+        self, output: str, scope: Scope, receive: Receive, send: Send
+    ):
+        status = 500
+
+        async def discard_response(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        profiler = Profiler(interval=self.config.PROFILING_INTERVAL)
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            session = profiler.stop()
+        content, media_type = render_profile(session, output)
+        response = Response(
+            content,
+            media_type=media_type,
+            headers={'X-Profiled-Status': str(status)},
+        )
+        await response(scope, receive, send)
+
+    async def sample_request(self, scope: Scope, receive: Receive, send: Send):
+        profiler = Profiler(interval=self.config.PROFILING_INTERVAL)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.stop()
+            route = scope.get('route')
+            self.profiles.add(
+                f'{scope["method"]} {getattr(route, "path", "unmatched")}',
+                session,
+            )
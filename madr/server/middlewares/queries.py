@@ -0,0 +1,54 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from madr.database.queries import track_queries
+from madr.infra import Configs
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCountMiddleware:
+    """Count the SQL statements of every request.
+
+    With ``DATABASE_QUERY_HEADERS`` the totals are sent back as the
+    ``X-DB-Query-Count`` and ``X-DB-Query-Time`` (ms) headers. Statements
+    repeated ``DATABASE_REPEATED_QUERY_THRESHOLD`` times in one request
+    are logged as a probable N+1.
+    """
+
+    def __init__(self, app: ASGIApp, config: Configs):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        route = f'{scope["method"]} {scope["path"]}'
+        with track_queries(route) as stats:
+
+            async def send_with_headers(message: Message):
+                if (
+                    message['type'] == 'http.response.start'
+                    and self.config.DATABASE_QUERY_HEADERS
+                ):
+                    headers = MutableHeaders(scope=message)
+                    headers['X-DB-Query-Count'] = str(stats.count)
+                    headers['X-DB-Query-Time'] = f'{stats.seconds * 1000:.3f}'
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
+
+        repeated = stats.repeated(
+            self.config.DATABASE_REPEATED_QUERY_THRESHOLD
+        )
+        for statement, times in repeated.items():
+            logger.warning(
+                'Possible N+1 on %s %s: statement ran %d times: %s',
+                scope['method'],
+                scope['path'],
+                times,
+                statement,
+            )
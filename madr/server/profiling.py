@@ -0,0 +1,106 @@
+"""Sampling profiles of requests, on demand or continuously.
+
+Admins get the profile of a single request back instead of its body by
+sending ``X-Profile: html`` (or ``speedscope``), or ``?profile=html``.
+With ``PROFILING_SAMPLE_RATE`` a share of all requests is profiled and
+the stacks are added up per route in ``PROFILING_DIR/<pid>.folded``, in
+the folded format read by speedscope and ``flamegraph.pl``.
+"""
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+
+from fastapi import HTTPException
+from pyinstrument.frame import Frame
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
+
+from madr.infra import Configs
+from madr.tools.security import get_payload_from_token
+
+RENDERERS = {
+    'html': (HTMLRenderer, 'text/html; charset=utf-8'),
+    'speedscope': (SpeedscopeRenderer, 'application/json'),
+}
+
+
+def render_profile(session: Session, output: str) -> tuple[str, str]:
+    renderer, media_type = RENDERERS[output]
+    return renderer().render(session), media_type
+
+
+def requested_output(scope, headers) -> str | None:
+    """The profile format asked for by the request, if any."""
+    output = headers.get('x-profile')
+    if output is None:
+        for param in scope['query_string'].decode('latin-1').split('&'):
+            name, _, value = param.partition('=')
+            if name == 'profile':
+                output = value or 'html'
+                break
+    return output if output in RENDERERS else None
+
+
+def is_admin(headers, config: Configs) -> bool:
+    scheme, _, token = headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not config.AUTH_ADMIN_EMAILS:
+        return False
+    try:
+        payload = get_payload_from_token(token)
+    except HTTPException:
+        return False
+    return payload.get('sub') in config.AUTH_ADMIN_EMAILS
+
+
+def _frame_name(frame: Frame) -> str:
+    return f'{frame.function} ({frame.file_path_short}:{frame.line_no})'
+
+
+def fold(frame: Frame, prefix: str, stacks: Counter):
+    """Add the self time of ``frame`` and its children to ``stacks``."""
+    stack = f'{prefix};{_frame_name(frame)}'
+    self_time = frame.time - sum(child.time for child in frame.children)
+    if self_time > 0:
+        stacks[stack] += self_time
+    for child in frame.children:
+        fold(child, stack, stacks)
+
+
+class FoldedProfiles:
+    """Self time per stack of the sampled requests of this process."""
+
+    def __init__(self, directory: Path, flush_every: int = 50):
+        self.path = directory / f'{os.getpid()}.folded'
+        self.flush_every = flush_every
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def add(self, route: str, session: Session):
+        root = session.root_frame()
+        if root is None:
+            return
+        with self._lock:
+            fold(root, route, self.stacks)
+            self.samples += 1
+            if self.samples % self.flush_every == 0:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self.stacks:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(
+            ''.join(
+                # folded files count samples; use microseconds of self time
+                f'{stack} {round(seconds * 1_000_000)}\n'
+                for stack, seconds in sorted(self.stacks.items())
+            )
+        )
+        tmp.replace(self.path)
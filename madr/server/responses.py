@@ -0,0 +1,39 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class of the app.
+
+    Pydantic models are dumped by alias straight to JSON bytes by
+    pydantic-core, skipping the dict round trip; anything else goes
+    through orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(
+                content, by_alias=True
+            )
+        return orjson.dumps(content)
+
+
+def model_response(
+    schema: type[BaseModel],
+    data: Any,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> ORJSONResponse:
+    """Validate ``data`` against ``schema`` once and send it.
+
+    Returning the response skips FastAPI's second validation against
+    ``response_model``, which then only documents the route.
+    """
+    return ORJSONResponse(
+        schema.model_validate(data, from_attributes=True),
+        status_code=status_code,
+        headers=headers,
+    )
@@ -1,12 +1,12 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database import get_session
-from madr.database.models import User
+from madr.database import get_async_session, get_session_maker
+from madr.server.responses import model_response
 from madr.server.schemas.accounts import (
     AccountRequestSchema,
     AccountResponseSchema,
@@ -19,6 +19,7 @@ from madr.server.services.account_service import (
     update_user,
 )
 from madr.server.services.auth_service import (
+    AuthenticatedUser,
     auth_service,
     get_current_user,
     refresh_token_service,
@@ -29,9 +30,12 @@ router = APIRouter(
     tags=['Contas'],
 )
 
-DBSession = Annotated[Session, Depends(get_session)]
+DBSession = Annotated[AsyncSession, Depends(get_async_session)]
+SessionMaker = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_session_maker)
+]
 AuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[AuthenticatedUser, Depends(get_current_user)]
 
 
 @router.post(
@@ -39,9 +43,9 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
     status_code=status.HTTP_201_CREATED,
     response_model=AccountResponseSchema,
 )
-def create_account(account: AccountRequestSchema, db: DBSession):
-    user = register_user(account, db)
-    return user
+async def create_account(account: AccountRequestSchema, db: DBSession):
+    user = await register_user(account, db)
+    return model_response(AccountResponseSchema, user, status.HTTP_201_CREATED)
 
 
 @router.put(
@@ -49,33 +53,38 @@ def create_account(account: AccountRequestSchema, db: DBSession):
     status_code=status.HTTP_200_OK,
     response_model=AccountResponseSchema,
 )
-def update_account(
+async def update_account(
     id: int,
     account: AccountRequestSchema,
     current_user: CurrentUser,
     db: DBSession,
 ):
-    updated_user = update_user(id, account, db, current_user)
-    return updated_user
+    updated_user = await update_user(id, account, db, current_user)
+    return model_response(AccountResponseSchema, updated_user)
 
 
 @router.delete(
     '/conta/{id}', status_code=status.HTTP_200_OK, response_model=Message
 )
-def delete_account(id: int, current_user: CurrentUser, db: DBSession):
-    delete_user(id, db, current_user)
+async def delete_account(id: int, current_user: CurrentUser, db: DBSession):
+    await delete_user(id, db, current_user)
     return Message(message='Conta deletada com sucesso!')
 
 
 @router.post(
     '/token', status_code=status.HTTP_200_OK, response_model=TokenSchema
 )
-def create_token(form: AuthForm, db: DBSession):
-    token = auth_service(form, db)
+async def create_token(
+    form: AuthForm,
+    db: DBSession,
+    tasks: BackgroundTasks,
+    session_maker: SessionMaker,
+):
+    token = await auth_service(form, db, tasks, session_maker)
     return token
 
 
 @router.post('/refresh-token', status_code=status.HTTP_200_OK)
-def refresh_token(current_user: CurrentUser):
+async def refresh_token(current_user: CurrentUser):
     new_token = refresh_token_service(current_user.token)
     return new_token
@@ -1,33 +1,65 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database.models import User
-from madr.server.schemas.base import Message
+from madr.database import get_async_session, get_session_maker
+from madr.infra import config
+from madr.server.responses import model_response
+from madr.server.schemas.base import BulkReportSchema, Message
 from madr.server.schemas.books import (
+    BOOK_FIELDS,
     CreateBookRequestSchema,
     CreateBookResponseSchema,
     GetBookResponseSchema,
     GetManyBooksResponseSchema,
     UpdateBookRequestSchema,
+    UpdateBookResponseSchema,
+)
+from madr.server.services.auth_service import (
+    AuthenticatedUser,
+    get_current_user,
 )
-from madr.server.services.auth_service import get_current_user, get_session
 from madr.server.services.book_service import (
+    bulk_create_books_service,
     create_book_service,
     delete_book_service,
+    export_books_service,
     get_book_service,
+    get_book_version_service,
     get_books_service,
+    get_books_version_service,
     update_book_service,
 )
+from madr.tools.bulk import bulk_report, read_batches
+from madr.tools.export import ExportFormat, export_response
+from madr.tools.fields import parse_fields, sparse_schema
+from madr.tools.http_cache import (
+    cache_headers,
+    is_conditional,
+    is_not_modified,
+    not_modified,
+    page_etag,
+    record_etag,
+)
 
 router = APIRouter(
     prefix='/livros',
     tags=['Livros'],
 )
 
-DBSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+DBSession = Annotated[AsyncSession, Depends(get_async_session)]
+SessionMaker = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_session_maker)
+]
+CurrentUser = Annotated[AuthenticatedUser, Depends(get_current_user)]
+Fields = Annotated[
+    str | None,
+    Query(
+        alias='campos',
+        description='Campos da resposta: ' + ', '.join(BOOK_FIELDS),
+    ),
+]
 
 
 @router.post(
@@ -35,42 +67,34 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
     status_code=status.HTTP_201_CREATED,
     response_model=CreateBookResponseSchema,
 )
-def create_book(
+async def create_book(
     data: CreateBookRequestSchema, current_user: CurrentUser, db: DBSession
 ):
-    book = create_book_service(data, db)
-    return CreateBookResponseSchema(
-        id=book.id,
-        ano=book.year,
-        titulo=book.title,
-        romancista_id=book.author_id,
+    book = await create_book_service(data, db)
+    return model_response(
+        CreateBookResponseSchema, book, status.HTTP_201_CREATED
     )
 
 
 @router.delete('/livro/{id}', status_code=status.HTTP_200_OK)
-def delete_book(id: int, current_user: CurrentUser, db: DBSession):
-    delete_book_service(id, db)
+async def delete_book(id: int, current_user: CurrentUser, db: DBSession):
+    await delete_book_service(id, db)
     return Message(message='Livro deletado no MADR')
 
 
 @router.patch(
     '/livro/{id}',
     status_code=status.HTTP_200_OK,
-    response_model=UpdateBookRequestSchema,
+    response_model=UpdateBookResponseSchema,
 )
-def update_book(
+async def update_book(
     id: int,
     data: UpdateBookRequestSchema,
     current_user: CurrentUser,
     db: DBSession,
 ):
-    new_book = update_book_service(id, data, db)
-    return UpdateBookRequestSchema(
-        id=new_book.id,
-        ano=new_book.year,
-        titulo=new_book.title,
-        romancista_id=new_book.author_id,
-    )
+    new_book = await update_book_service(id, data, db)
+    return model_response(UpdateBookResponseSchema, new_book)
 
 
 @router.get(
@@ -78,14 +102,31 @@ def update_book(
     status_code=status.HTTP_200_OK,
     response_model=GetBookResponseSchema,
 )
-def get_book(id: int, db: DBSession):
-    book = get_book_service({'id': id}, db=db)
-    return GetBookResponseSchema(
-        id=book.id,
-        ano=book.year,
-        titulo=book.title,
-        romancista_id=book.author_id,
+async def get_book(
+    id: int, request: Request, db: DBSession, fields: Fields = None
+):
+    fieldset = parse_fields(fields, BOOK_FIELDS)
+    schema = GetBookResponseSchema
+    variant = ''
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names)
+        variant = ','.join(fieldset.names)
+    updated_at = None
+    if is_conditional(request):
+        updated_at = await get_book_version_service(id, db)
+        headers = cache_headers(
+            record_etag(id, updated_at, variant), updated_at
+        )
+        if is_not_modified(request, headers['ETag'], updated_at):
+            return not_modified(headers)
+
+    book = await get_book_service(
+        id, db, fieldset and fieldset.attrs, updated_at
+    )
+    headers = cache_headers(
+        record_etag(book.id, book.updated_at, variant), book.updated_at
     )
+    return model_response(schema, book, headers=headers)
 
 
 @router.get(
@@ -93,25 +134,86 @@ def get_book(id: int, db: DBSession):
     status_code=status.HTTP_200_OK,
     response_model=GetManyBooksResponseSchema,
 )
-def get_books(
+async def get_books(
+    request: Request,
     db: DBSession,
     year: int | None = Query(None, alias='ano'),
     title: str | None = Query(None, alias='titulo'),
     page: int = Query(1, alias='pagina'),
+    cursor: str | None = None,
+    fields: Fields = None,
 ):
+    fieldset = parse_fields(fields, BOOK_FIELDS)
     where = {}
     if year:
         where['year'] = year
     if title:
         where['title'] = title
-    books = get_books_service(where, db, page)
-    books = [
-        GetBookResponseSchema(
-            id=book.id,
-            ano=book.year,
-            titulo=book.title,
-            romancista_id=book.author_id,
-        )
-        for book in books
-    ]
-    return GetManyBooksResponseSchema(livros=books)
+    if is_conditional(request):
+        versions = await get_books_version_service(where, db, page, cursor)
+        headers = cache_headers(page_etag(request, versions))
+        if is_not_modified(request, headers['ETag']):
+            return not_modified(headers)
+
+    result = await get_books_service(
+        where, db, page, cursor, fieldset and fieldset.attrs
+    )
+    headers = cache_headers(page_etag(request, result))
+    schema = GetManyBooksResponseSchema
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names, 'books')
+    return model_response(
+        schema,
+        {'livros': result.items, 'next_cursor': result.next_cursor},
+        headers=headers,
+    )
+
+
+@router.get('/export', status_code=status.HTTP_200_OK)
+async def export_books(
+    session_maker: SessionMaker,
+    year: int | None = Query(None, alias='ano'),
+    title: str | None = Query(None, alias='titulo'),
+    format: ExportFormat = Query('ndjson', alias='formato'),
+    fields: Fields = None,
+):
+    fieldset = parse_fields(fields, BOOK_FIELDS)
+    where = {}
+    if year:
+        where['year'] = year
+    if title:
+        where['title'] = title
+    schema = GetBookResponseSchema
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names)
+    batches = export_books_service(
+        where, session_maker, fieldset and fieldset.attrs
+    )
+    return export_response(batches, schema, format, 'livros')
+
+
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_200_OK,
+    response_model=BulkReportSchema,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/x-ndjson': {}},
+        }
+    },
+)
+async def bulk_create_books(
+    request: Request, current_user: CurrentUser, db: DBSession
+):
+    results = []
+    async for rows, errors in read_batches(
+        request.stream(),
+        CreateBookRequestSchema,
+        config.BULK_BATCH_SIZE,
+        config.BULK_MAX_LINE_BYTES,
+    ):
+        results += errors
+        if rows:
+            results += await bulk_create_books_service(rows, db)
+    return model_response(BulkReportSchema, bulk_report(results))
@@ -1,33 +1,63 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database.database import get_session
-from madr.database.models import User
-from madr.server.schemas.base import Message
+from madr.database import get_async_session, get_session_maker
+from madr.infra import config
+from madr.server.responses import model_response
+from madr.server.schemas.base import BulkReportSchema, Message
 from madr.server.schemas.novelist import (
+    NOVELIST_FIELDS,
     GetManyNovelistsResponseSchema,
     NovelistRequestSchema,
     NovelistResponseSchema,
 )
-from madr.server.services.auth_service import get_current_user
+from madr.server.services.auth_service import (
+    AuthenticatedUser,
+    get_current_user,
+)
 from madr.server.services.novelist_service import (
+    bulk_create_novelists_service,
     create_novelist_service,
     delete_novelist_service,
+    export_novelists_service,
     get_novelist_service,
+    get_novelist_version_service,
     get_novelists_service,
+    get_novelists_version_service,
     update_novelist_service,
 )
+from madr.tools.bulk import bulk_report, read_batches
+from madr.tools.export import ExportFormat, export_response
+from madr.tools.fields import parse_fields, sparse_schema
+from madr.tools.http_cache import (
+    cache_headers,
+    is_conditional,
+    is_not_modified,
+    not_modified,
+    page_etag,
+    record_etag,
+)
 
 router = APIRouter(
     prefix='/romancistas',
     tags=['Romancistas'],
 )
 
-DBSession = Annotated[Session, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+DBSession = Annotated[AsyncSession, Depends(get_async_session)]
+SessionMaker = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_session_maker)
+]
+CurrentUser = Annotated[AuthenticatedUser, Depends(get_current_user)]
+Fields = Annotated[
+    str | None,
+    Query(
+        alias='campos',
+        description='Campos da resposta: ' + ', '.join(NOVELIST_FIELDS),
+    ),
+]
 
 
 @router.post(
@@ -35,19 +65,18 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
     status_code=status.HTTP_201_CREATED,
     response_model=NovelistResponseSchema,
 )
-def create_novelist(
+async def create_novelist(
     data: NovelistRequestSchema, current_user: CurrentUser, db: DBSession
 ):
-    novelist = create_novelist_service(data, db)
-    return NovelistResponseSchema(
-        id=novelist.id,
-        nome=novelist.name,
+    novelist = await create_novelist_service(data, db)
+    return model_response(
+        NovelistResponseSchema, novelist, status.HTTP_201_CREATED
     )
 
 
 @router.delete('/romancista/{id}', status_code=status.HTTP_200_OK)
-def delete_novelist(id: int, current_user: CurrentUser, db: DBSession):
-    delete_novelist_service(id, db)
+async def delete_novelist(id: int, current_user: CurrentUser, db: DBSession):
+    await delete_novelist_service(id, db)
     return Message(message='Romancista deletado no MADR')
 
 
@@ -56,17 +85,14 @@ def delete_novelist(id: int, current_user: CurrentUser, db: DBSession):
     status_code=status.HTTP_200_OK,
     response_model=NovelistResponseSchema,
 )
-def update_novelist(
+async def update_novelist(
     id: int,
     data: NovelistRequestSchema,
     current_user: CurrentUser,
     db: DBSession,
 ):
-    novelist = update_novelist_service(id, data, db)
-    return NovelistResponseSchema(
-        id=novelist.id,
-        nome=novelist.name,
-    )
+    novelist = await update_novelist_service(id, data, db)
+    return model_response(NovelistResponseSchema, novelist)
 
 
 @router.get(
@@ -74,12 +100,32 @@ def update_novelist(
     status_code=status.HTTP_200_OK,
     response_model=NovelistResponseSchema,
 )
-def get_novelist(id: int, db: DBSession):
-    novelist = get_novelist_service({'id': id}, db)
-    return NovelistResponseSchema(
-        id=novelist.id,
-        nome=novelist.name,
+async def get_novelist(
+    id: int, request: Request, db: DBSession, fields: Fields = None
+):
+    fieldset = parse_fields(fields, NOVELIST_FIELDS)
+    schema = NovelistResponseSchema
+    variant = ''
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names)
+        variant = ','.join(fieldset.names)
+    updated_at = None
+    if is_conditional(request):
+        updated_at = await get_novelist_version_service(id, db)
+        headers = cache_headers(
+            record_etag(id, updated_at, variant), updated_at
+        )
+        if is_not_modified(request, headers['ETag'], updated_at):
+            return not_modified(headers)
+
+    novelist = await get_novelist_service(
+        id, db, fieldset and fieldset.attrs, updated_at
     )
+    headers = cache_headers(
+        record_etag(novelist.id, novelist.updated_at, variant),
+        novelist.updated_at,
+    )
+    return model_response(schema, novelist, headers=headers)
 
 
 @router.get(
@@ -87,21 +133,80 @@ def get_novelist(id: int, db: DBSession):
     status_code=status.HTTP_200_OK,
     response_model=GetManyNovelistsResponseSchema,
 )
-def get_novelists(
+async def get_novelists(
+    request: Request,
     db: DBSession,
     name: str | None = Query(None, alias='nome'),
     page: int = 1,
+    cursor: str | None = None,
+    fields: Fields = None,
 ):
-    where = {
-        'name': name,
-    }
-    novelists = get_novelists_service(where, db, page)
-    return GetManyNovelistsResponseSchema(
-        romancistas=[
-            NovelistResponseSchema(
-                id=novelist.id,
-                nome=novelist.name,
-            )
-            for novelist in novelists
-        ]
+    fieldset = parse_fields(fields, NOVELIST_FIELDS)
+    where = {}
+    if name:
+        where['name'] = name
+    if is_conditional(request):
+        versions = await get_novelists_version_service(where, db, page, cursor)
+        headers = cache_headers(page_etag(request, versions))
+        if is_not_modified(request, headers['ETag']):
+            return not_modified(headers)
+
+    result = await get_novelists_service(
+        where, db, page, cursor, fieldset and fieldset.attrs
+    )
+    headers = cache_headers(page_etag(request, result))
+    schema = GetManyNovelistsResponseSchema
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names, 'romancistas')
+    return model_response(
+        schema,
+        {'romancistas': result.items, 'next_cursor': result.next_cursor},
+        headers=headers,
     )
+
+
+@router.get('/export', status_code=status.HTTP_200_OK)
+async def export_novelists(
+    session_maker: SessionMaker,
+    name: str | None = Query(None, alias='nome'),
+    format: ExportFormat = Query('ndjson', alias='formato'),
+    fields: Fields = None,
+):
+    fieldset = parse_fields(fields, NOVELIST_FIELDS)
+    where = {}
+    if name:
+        where['name'] = name
+    schema = NovelistResponseSchema
+    if fieldset:
+        schema = sparse_schema(schema, fieldset.names)
+    batches = export_novelists_service(
+        where, session_maker, fieldset and fieldset.attrs
+    )
+    return export_response(batches, schema, format, 'romancistas')
+
+
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_200_OK,
+    response_model=BulkReportSchema,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/x-ndjson': {}},
+        }
+    },
+)
+async def bulk_create_novelists(
+    request: Request, current_user: CurrentUser, db: DBSession
+):
+    results = []
+    async for rows, errors in read_batches(
+        request.stream(),
+        NovelistRequestSchema,
+        config.BULK_BATCH_SIZE,
+        config.BULK_MAX_LINE_BYTES,
+    ):
+        results += errors
+        if rows:
+            results += await bulk_create_novelists_service(rows, db)
+    return model_response(BulkReportSchema, bulk_report(results))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class AccountRequestSchema(BaseModel):
@@ -8,6 +8,8 @@ class AccountRequestSchema(BaseModel):
 
 
 class AccountResponseSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int = Field(..., serialization_alias='id')
     username: str = Field(..., serialization_alias='username')
     email: EmailStr = Field(..., serialization_alias='email')
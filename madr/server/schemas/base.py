@@ -1,5 +1,25 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+from madr.tools.bulk import BulkStatus
 
 
 class Message(BaseModel):
     message: str
+
+
+class BulkRowSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    line: int = Field(
+        alias='linha', validation_alias=AliasChoices('line', 'linha')
+    )
+    status: BulkStatus
+    id: int | None = None
+    detail: str | None = None
+
+
+class BulkReportSchema(BaseModel):
+    created: int = Field(alias='criados')
+    conflicts: int = Field(alias='conflitos')
+    errors: int = Field(alias='erros')
+    rows: list[BulkRowSchema] = Field(alias='linhas')
@@ -1,4 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+# public name -> record attribute, for ``campos``
+BOOK_FIELDS = {
+    'id': 'id',
+    'ano': 'year',
+    'titulo': 'title',
+    'romancista_id': 'author_id',
+}
 
 
 class BaseBook(BaseModel):
@@ -7,11 +15,32 @@ class BaseBook(BaseModel):
     novelist_id: int = Field(alias='romancista_id')
 
 
+class BookResponseSchema(BaseBook):
+    """Validated from records and models by attribute name first.
+
+    Trying the attribute names before the aliases saves a failed
+    ``getattr`` per field; the output still uses the aliases.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    year: int = Field(
+        alias='ano', validation_alias=AliasChoices('year', 'ano')
+    )
+    title: str = Field(
+        alias='titulo', validation_alias=AliasChoices('title', 'titulo')
+    )
+    novelist_id: int = Field(
+        alias='romancista_id',
+        validation_alias=AliasChoices('author_id', 'romancista_id'),
+    )
+
+
 class CreateBookRequestSchema(BaseBook):
     pass
 
 
-class CreateBookResponseSchema(BaseBook):
+class CreateBookResponseSchema(BookResponseSchema):
     id: int
 
 
@@ -19,13 +48,16 @@ class UpdateBookRequestSchema(BaseBook):
     pass
 
 
-class UpdateBookResponseSchema(BaseBook):
+class UpdateBookResponseSchema(BookResponseSchema):
     pass
 
 
-class GetBookResponseSchema(BaseBook):
+class GetBookResponseSchema(BookResponseSchema):
     id: int
 
 
 class GetManyBooksResponseSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     books: list[GetBookResponseSchema] = Field(alias='livros')
+    next_cursor: str | None = None
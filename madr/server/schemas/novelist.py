@@ -1,4 +1,13 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+)
+
+# public name -> record attribute, for ``campos``
+NOVELIST_FIELDS = {'id': 'id', 'nome': 'name'}
 
 
 class BaseNovelist(BaseModel):
@@ -15,8 +24,16 @@ class NovelistRequestSchema(BaseNovelist):
 
 
 class NovelistResponseSchema(BaseNovelist):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
+    name: str = Field(
+        alias='nome', validation_alias=AliasChoices('name', 'nome')
+    )
 
 
 class GetManyNovelistsResponseSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     romancistas: list[NovelistResponseSchema] = Field(alias='romancistas')
+    next_cursor: str | None = None
@@ -1,66 +1,111 @@
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from madr.database.database import dialect_insert
 from madr.database.models import User
 from madr.server.schemas.accounts import AccountRequestSchema
+from madr.server.services.auth_service import (
+    AuthenticatedUser,
+    invalidate_current_user,
+)
 from madr.tools import hash, sanitize
 
+AccountNotFound = HTTPException(
+    status_code=status.HTTP_404_NOT_FOUND,
+    detail='Conta não encontrada',
+)
 
-def register_user(account: AccountRequestSchema, db: Session):
-    existent_user = db.scalar(
-        select(User).where(
-            (User.username == account.username) | (User.email == account.email)
-        )
+AccountConflict = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail='Conta já consta no MADR',
+)
+
+
+async def _ensure_own_account(
+    id: int, db: AsyncSession, current_user: AuthenticatedUser, detail: str
+):
+    if id == current_user.id:
+        return
+    if not await db.scalar(select(User.id).where(User.id == id)):
+        raise AccountNotFound
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail=detail
     )
-    if existent_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Conta já consta no MADR',
-        )
-    pwd = hash.hash_pwd(account.password)
+
+
+async def register_user(account: AccountRequestSchema, db: AsyncSession):
     username = sanitize.sanitize_str(account.username)
-    user = User(username=username, email=account.email, password=pwd)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    # bcrypt is the slow part; don't pay for it on a known conflict and
+    # leave ON CONFLICT for the race with a concurrent registration
+    if await db.scalar(
+        select(User.id).where(
+            (User.username == username) | (User.email == account.email)
+        )
+    ):
+        raise AccountConflict
+    user = await db.scalar(
+        dialect_insert(db, User)
+        .values(
+            username=username,
+            email=account.email,
+            password=await hash.async_hash_pwd(account.password),
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
+    if not user:
+        raise AccountConflict
+    await db.commit()
     return user
 
 
-def update_user(
-    id: int, account: AccountRequestSchema, db: Session, current_user: User
+async def update_user(
+    id: int,
+    account: AccountRequestSchema,
+    db: AsyncSession,
+    current_user: AuthenticatedUser,
 ):
-    user = db.get(User, id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Conta não encontrada',
-        )
-    if user.id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Usuário não tem permissão para alterar esta conta',
+    await _ensure_own_account(
+        id,
+        db,
+        current_user,
+        'Usuário não tem permissão para alterar esta conta',
+    )
+    try:
+        user = await db.scalar(
+            update(User)
+            .where(User.id == id)
+            .values(
+                username=sanitize.sanitize_str(account.username),
+                email=account.email,
+                password=await hash.async_hash_pwd(account.password),
+            )
+            .returning(User)
         )
-    user.username = sanitize.sanitize_str(account.username)
-    user.email = account.email
-    user.password = hash.hash_pwd(account.password)
-    db.commit()
-    db.refresh(user)
+    except IntegrityError as e:
+        await db.rollback()
+        raise AccountConflict from e
+    if not user:
+        raise AccountNotFound
+    await db.commit()
+    invalidate_current_user(current_user.email)
     return user
 
 
-def delete_user(id: int, db: Session, current_user: User):
-    user = db.get(User, id)
+async def delete_user(
+    id: int, db: AsyncSession, current_user: AuthenticatedUser
+):
+    await _ensure_own_account(
+        id,
+        db,
+        current_user,
+        'Usuário não tem permissão para deletar esta conta',
+    )
+    user = await db.scalar(delete(User).where(User.id == id).returning(User))
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail='Conta não encontrada',
-        )
-    if user.id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail='Usuário não tem permissão para deletar esta conta',
-        )
-    db.delete(user)
-    db.commit()
+        raise AccountNotFound
+    await db.commit()
+    invalidate_current_user(user.email)
     return user
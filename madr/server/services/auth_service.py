@@ -1,16 +1,20 @@
+import time
+from dataclasses import dataclass, replace
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database import get_session
+from madr.database import get_async_session
 from madr.database.models import User
+from madr.infra import config
 from madr.tools import hash, security
+from madr.tools.cache import TTLCache
 
 AuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
-DBSession = Annotated[Session, Depends(get_session)]
+DBSession = Annotated[AsyncSession, Depends(get_async_session)]
 
 AuthException = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST, detail='Email ou senha incorretos'
@@ -29,14 +33,68 @@ NotFoundUserException = HTTPException(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='contas/token')
 
 
-def auth_service(form: AuthForm, db: Session):
-    user = db.scalar(select(User).where(User.email == form.username))
+@dataclass(frozen=True, slots=True)
+class AuthenticatedUser:
+    id: int
+    username: str
+    email: str
+    token: str = ''
+
+
+user_cache = TTLCache(
+    maxsize=config.AUTH_USER_CACHE_SIZE,
+    ttl=config.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_current_user(email: str):
+    user_cache.delete(email)
+
+
+async def rehash_password(
+    user_id: int,
+    password: str,
+    old_hash: str,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    try:
+        new_hash = await hash.async_hash_pwd(password)
+    except HTTPException as e:
+        if e is not hash.HashPoolSaturatedException:
+            raise  # pragma: no cover
+        # the response is gone already; the next login rehashes
+        return
+    async with session_maker() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.password == old_hash)
+            .values(password=new_hash)
+        )
+        await db.commit()
+
+
+async def auth_service(
+    form: AuthForm,
+    db: AsyncSession,
+    tasks: BackgroundTasks,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    user = await db.scalar(select(User).where(User.email == form.username))
     if not user:
         raise AuthException
 
-    if not hash.check_pwd(form.password, user.password):
+    if not await hash.async_check_pwd(form.password, user.password):
         raise AuthException
 
+    if hash.needs_rehash(user.password):
+        tasks.add_task(
+            rehash_password,
+            user.id,
+            form.password,
+            user.password,
+            session_maker,
+        )
+
     access_token = security.create_access_token({'sub': user.email})
     return {'access_token': access_token, 'token_type': 'bearer'}
 
@@ -53,8 +111,11 @@ async def get_current_user(db: DBSession, token: str = Depends(oauth2_scheme)):
         raise InvalidCredentialsException
     payload = security.get_payload_from_token(token)
     username: str = payload.get('sub')
-    user = db.scalar(select(User).where(User.email == username))
-    if user is None:
-        raise InvalidCredentialsException
-    user.token = token
-    return user
+    current_user = user_cache.get(username)
+    if current_user is None:
+        user = await db.scalar(select(User).where(User.email == username))
+        if user is None:
+            raise InvalidCredentialsException
+        current_user = AuthenticatedUser(user.id, user.username, user.email)
+        user_cache.set(username, current_user, payload['exp'] - time.time())
+    return replace(current_user, token=token)
@@ -1,14 +1,29 @@
-from typing import TypedDict
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import starmap
+from typing import AsyncIterator, TypedDict
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, delete, null, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database.models import Book
+from madr.database.database import dialect_insert
+from madr.database.models import Book, Novelists
+from madr.database.search import contains
+from madr.infra import config
 from madr.server.schemas.books import (
     CreateBookRequestSchema,
     UpdateBookRequestSchema,
 )
+from madr.tools.bulk import BATCH_REFUSED, BulkResult
+from madr.tools.cache import (
+    RecordCache,
+    SearchCache,
+    cache_backend,
+    search_cache_ttl,
+)
+from madr.tools.pagination import Page, paginate
 from madr.tools.sanitize import sanitize_str
 
 BookNotFound = HTTPException(
@@ -16,6 +31,65 @@ BookNotFound = HTTPException(
     detail='Livro não encontrado',
 )
 
+BookAlreadyRegistered = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail='Livro já cadastrado',
+)
+
+BookConflict = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail='Livro já cadastrado no MADR',
+)
+
+UNKNOWN_NOVELIST = 'Romancista não encontrado no MADR'
+
+
+@dataclass(frozen=True, slots=True)
+class BookRecord:
+    """A book as the API reads it; fields left out by ``campos`` are None."""
+
+    id: int
+    title: str | None
+    year: str | None
+    author_id: int | None
+    updated_at: datetime
+
+
+RECORD_COLUMNS = {
+    'id': Book.id,
+    'title': Book.title,
+    'year': Book.year,
+    'author_id': Book.author_id,
+    'updated_at': Book.updated_at,
+}
+
+
+def select_records(fields: tuple[str, ...] | None = None) -> Select:
+    """Rows shaped as :class:`BookRecord`, without loading ``Book``.
+
+    Columns left out by ``fields`` are read as NULL; ``id`` and
+    ``updated_at`` are always read, for paging and ETags.
+    """
+    return select(
+        *(
+            column
+            if fields is None or name in (*fields, 'id', 'updated_at')
+            else null()
+            for name, column in RECORD_COLUMNS.items()
+        )
+    )
+
+
+book_cache = RecordCache('book', BookRecord, cache_backend)
+book_search_cache = SearchCache(
+    'books', BookRecord, cache_backend, search_cache_ttl(config)
+)
+
+
+async def invalidate_books(*ids: int):
+    await book_cache.delete(*ids)
+    await book_search_cache.bump()
+
 
 class BookWhere(TypedDict, total=False):
     id: int
@@ -24,78 +98,229 @@ class BookWhere(TypedDict, total=False):
     novelist: int
 
 
-def create_book_service(data: CreateBookRequestSchema, db: Session) -> Book:
-    book = Book(
-        title=data.title,
-        year=data.year,
-        author_id=data.novelist_id,
+async def create_book_service(
+    data: CreateBookRequestSchema, db: AsyncSession
+) -> Book:
+    book = await db.scalar(
+        dialect_insert(db, Book)
+        .values(
+            title=sanitize_str(data.title),
+            year=data.year,
+            author_id=data.novelist_id,
+        )
+        .on_conflict_do_nothing(index_elements=[Book.title])
+        .returning(Book)
     )
-    book.title = sanitize_str(book.title)
+    if not book:
+        raise BookAlreadyRegistered
+
+    await db.commit()
+    await invalidate_books(book.id)
+    return book
 
-    if db.scalar(select(Book).filter(Book.title == book.title)):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Livro já cadastrado',
+
+async def bulk_create_books_service(
+    rows: list[tuple[int, CreateBookRequestSchema]], db: AsyncSession
+) -> list[BulkResult]:
+    """Insert a batch of books with one statement and one commit.
+
+    Titles already in the MADR or repeated in the batch are conflicts;
+    books of novelists that do not exist are refused.
+    """
+    author_ids = {data.novelist_id for _, data in rows}
+    novelists = set(
+        await db.scalars(
+            select(Novelists.id).where(Novelists.id.in_(author_ids))
         )
+    )
+    results = []
+    lines: dict[str, int] = {}
+    values = []
+    for line, data in rows:
+        title = sanitize_str(data.title)
+        if data.novelist_id not in novelists:
+            results.append(BulkResult(line, 'erro', detail=UNKNOWN_NOVELIST))
+        elif title in lines:
+            results.append(
+                BulkResult(
+                    line, 'conflito', detail=BookAlreadyRegistered.detail
+                )
+            )
+        else:
+            lines[title] = line
+            values.append(
+                {
+                    'title': title,
+                    'year': data.year,
+                    'author_id': data.novelist_id,
+                }
+            )
+    if not values:
+        return results
 
-    db.add(book)
-    db.commit()
-    db.refresh(book)
-    return book
+    try:
+        created = dict(
+            (
+                await db.execute(
+                    dialect_insert(db, Book)
+                    .values(values)
+                    .on_conflict_do_nothing(index_elements=[Book.title])
+                    .returning(Book.title, Book.id)
+                )
+            ).all()
+        )
+        await db.commit()
+    except IntegrityError:
+        # e.g. a novelist deleted meanwhile; the next batches still run
+        await db.rollback()
+        return results + [
+            BulkResult(line, 'erro', detail=BATCH_REFUSED)
+            for line in lines.values()
+        ]
+    await invalidate_books(*created.values())
+    for title, line in lines.items():
+        if title in created:
+            results.append(BulkResult(line, 'criado', id=created[title]))
+        else:
+            results.append(
+                BulkResult(
+                    line, 'conflito', detail=BookAlreadyRegistered.detail
+                )
+            )
+    return results
 
 
-def delete_book_service(id: int, db: Session) -> Book:
-    book = db.get(Book, id)
+async def delete_book_service(id: int, db: AsyncSession) -> Book:
+    book = await db.scalar(delete(Book).where(Book.id == id).returning(Book))
     if not book:
         raise BookNotFound
 
-    db.delete(book)
-    db.commit()
+    await db.commit()
+    await invalidate_books(id)
     return book
 
 
-def update_book_service(
-    id: int, data: UpdateBookRequestSchema, db: Session
+async def update_book_service(
+    id: int, data: UpdateBookRequestSchema, db: AsyncSession
 ) -> Book:
-    book = db.get(Book, id)
+    title = sanitize_str(data.title)
+    try:
+        book = await db.scalar(
+            update(Book)
+            .where(Book.id == id, Book.title != title)
+            .values(year=data.year, title=title, author_id=data.novelist_id)
+            .returning(Book)
+        )
+    except IntegrityError as e:
+        await db.rollback()
+        raise BookConflict from e
     if not book:
-        raise BookNotFound
+        if not await db.scalar(select(Book.id).where(Book.id == id)):
+            raise BookNotFound
+        raise BookConflict
 
-    if book.title == sanitize_str(data.title):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Livro já cadastrado no MADR',
-        )
-    book.year = data.year
-    book.title = sanitize_str(data.title)
-    book.author_id = data.novelist_id
-    db.commit()
-    db.refresh(book)
+    await db.commit()
+    await invalidate_books(id)
     return book
 
 
-def get_books_service(where: BookWhere, db: Session, page: int = 1):
+async def get_books_service(
+    where: BookWhere,
+    db: AsyncSession,
+    page: int = 1,
+    cursor: str | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> Page[BookRecord]:
     if not where:
-        return []  # pragma: no cover
-    query = select(Book).filter_by(**where).limit(20).offset((page - 1) * 20)
+        return Page([])  # pragma: no cover
     title = where.pop('title', None)
     if title:
         title = sanitize_str(title)
-        query = (
-            select(Book)
-            .filter(Book.title.like(f'%{title}%'))
-            .limit(20)
-            .offset((page - 1) * 20)
-        )
+    key = await book_search_cache.key(
+        title, where, None if cursor else page, cursor, fields
+    )
+    result = await book_search_cache.get(key)
+    if result is not None:
+        return result
 
-    novelists = db.scalars(query).all()
-    return novelists
+    query = select_records(fields)
+    if title:
+        query = query.filter(await contains(db, Book.title, title))
+    query = query.filter_by(**where)
+    books = await paginate(db, query, Book.id, page, cursor, rows=True)
+    result = Page(list(starmap(BookRecord, books.items)), books.next_cursor)
+    await book_search_cache.set(key, result)
+    return result
 
 
-def get_book_service(where: BookWhere, db: Session) -> Book:
-    if not where:
-        return None  # pragma: no cover
-    book = db.scalar(select(Book).filter_by(**where))
-    if not book:
+async def get_books_version_service(
+    where: BookWhere,
+    db: AsyncSession,
+    page: int = 1,
+    cursor: str | None = None,
+) -> Page[BookRecord]:
+    """The same page with only ``id`` and ``updated_at``, for list ETags."""
+    return await get_books_service(dict(where), db, page, cursor, ())
+
+
+async def get_book_service(
+    id: int,
+    db: AsyncSession,
+    fields: tuple[str, ...] | None = None,
+    updated_at: datetime | None = None,
+) -> BookRecord:
+    """The cached record, or only the columns of ``fields`` on a miss.
+
+    A cached record older than a known ``updated_at`` is read again.
+    """
+    book = await book_cache.get(id)
+    if book and updated_at in (None, book.updated_at):
+        return book
+    # taken before the query, so a write racing it keeps the row uncached
+    generation = await book_cache.generation() if fields is None else None
+    result = await db.execute(select_records(fields).where(Book.id == id))
+    row = result.first()
+    if not row:
         raise BookNotFound
+    book = BookRecord(*row)
+    await book_cache.set(book, generation)
     return book
+
+
+async def get_book_version_service(id: int, db: AsyncSession) -> datetime:
+    """Only ``updated_at``, to answer conditional requests cheaply.
+
+    Read from the database, not the record cache: a per-process cache
+    misses the writes handled by other workers.
+    """
+    updated_at = await db.scalar(select(Book.updated_at).where(Book.id == id))
+    if updated_at is None:
+        raise BookNotFound
+    return updated_at
+
+
+async def export_books_service(
+    where: BookWhere,
+    session_maker: async_sessionmaker[AsyncSession],
+    fields: tuple[str, ...] | None = None,
+) -> AsyncIterator[list[BookRecord]]:
+    """Every book matching ``where``, in batches from a server-side cursor.
+
+    The session is opened here, not by the route, so it lives as long as
+    the response is being streamed.
+    """
+    title = where.pop('title', None)
+    async with session_maker() as db:
+        query = select_records(fields)
+        if title:
+            query = query.filter(
+                await contains(db, Book.title, sanitize_str(title))
+            )
+        query = (
+            query.filter_by(**where)
+            .order_by(Book.id)
+            .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        )
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield list(starmap(BookRecord, rows))
@@ -1,11 +1,27 @@
-from typing import TypedDict
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import starmap
+from typing import AsyncIterator, TypedDict
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, delete, null, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from madr.database.models import Novelists
+from madr.database.database import dialect_insert
+from madr.database.models import Book, Novelists
+from madr.database.search import contains
+from madr.infra import config
 from madr.server.schemas.novelist import NovelistRequestSchema
+from madr.server.services.book_service import invalidate_books
+from madr.tools.bulk import BATCH_REFUSED, BulkResult
+from madr.tools.cache import (
+    RecordCache,
+    SearchCache,
+    cache_backend,
+    search_cache_ttl,
+)
+from madr.tools.pagination import Page, paginate
 from madr.tools.sanitize import sanitize_str
 
 NovelistNotFound = HTTPException(
@@ -13,74 +29,271 @@ NovelistNotFound = HTTPException(
     detail='Romancista não encontrado no MADR',
 )
 
+NovelistConflict = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail='Romancista já consta no MADR',
+)
+
+
+@dataclass(frozen=True, slots=True)
+class NovelistRecord:
+    """A novelist as the API reads it; ``name`` is None if left out."""
+
+    id: int
+    name: str | None
+    updated_at: datetime
+
+
+RECORD_COLUMNS = {
+    'id': Novelists.id,
+    'name': Novelists.name,
+    'updated_at': Novelists.updated_at,
+}
+
+
+def select_records(fields: tuple[str, ...] | None = None) -> Select:
+    """Rows shaped as :class:`NovelistRecord`, without loading ``Novelists``.
+
+    Columns left out by ``fields`` are read as NULL; ``id`` and
+    ``updated_at`` are always read, for paging and ETags.
+    """
+    return select(
+        *(
+            column
+            if fields is None or name in (*fields, 'id', 'updated_at')
+            else null()
+            for name, column in RECORD_COLUMNS.items()
+        )
+    )
+
+
+novelist_cache = RecordCache('novelist', NovelistRecord, cache_backend)
+novelist_search_cache = SearchCache(
+    'novelists',
+    NovelistRecord,
+    cache_backend,
+    search_cache_ttl(config),
+)
+
+
+async def invalidate_novelists(*ids: int):
+    await novelist_cache.delete(*ids)
+    await novelist_search_cache.bump()
+
 
 class NovelistWhere(TypedDict, total=False):
     id: int
     name: str
 
 
-def create_novelist_service(data: NovelistRequestSchema, db: Session):
-    novelist = Novelists(name=sanitize_str(data.name))
+async def create_novelist_service(
+    data: NovelistRequestSchema, db: AsyncSession
+):
+    novelist = await db.scalar(
+        dialect_insert(db, Novelists)
+        .values(name=sanitize_str(data.name))
+        .on_conflict_do_nothing(index_elements=[Novelists.name])
+        .returning(Novelists)
+    )
+    if not novelist:
+        raise NovelistConflict
+    await db.commit()
+    await invalidate_novelists(novelist.id)
+    return novelist
+
+
+async def bulk_create_novelists_service(
+    rows: list[tuple[int, NovelistRequestSchema]], db: AsyncSession
+) -> list[BulkResult]:
+    """Insert a batch of novelists with one statement and one commit.
 
-    if db.scalar(select(Novelists).filter(Novelists.name == novelist.name)):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Romancista já consta no MADR',
+    Names already in the MADR or repeated in the batch are conflicts.
+    """
+    results = []
+    lines: dict[str, int] = {}
+    for line, data in rows:
+        name = sanitize_str(data.name)
+        if name in lines:
+            results.append(
+                BulkResult(line, 'conflito', detail=NovelistConflict.detail)
+            )
+        else:
+            lines[name] = line
+    if not lines:
+        return results  # pragma: no cover
+
+    try:
+        created = dict(
+            (
+                await db.execute(
+                    dialect_insert(db, Novelists)
+                    .values([{'name': name} for name in lines])
+                    .on_conflict_do_nothing(index_elements=[Novelists.name])
+                    .returning(Novelists.name, Novelists.id)
+                )
+            ).all()
         )
-    db.add(novelist)
-    db.commit()
-    db.refresh(novelist)
-    return novelist
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return results + [
+            BulkResult(line, 'erro', detail=BATCH_REFUSED)
+            for line in lines.values()
+        ]
+    await invalidate_novelists(*created.values())
+    for name, line in lines.items():
+        if name in created:
+            results.append(BulkResult(line, 'criado', id=created[name]))
+        else:
+            results.append(
+                BulkResult(line, 'conflito', detail=NovelistConflict.detail)
+            )
+    return results
 
 
-def delete_novelist_service(id: int, db: Session):
-    novelist = db.get(Novelists, id)
-    if not novelist:
+async def delete_novelist_service(id: int, db: AsyncSession):
+    books = await db.scalars(
+        delete(Book).where(Book.author_id == id).returning(Book.id)
+    )
+    book_ids = books.all()
+    deleted = await db.scalar(
+        delete(Novelists).where(Novelists.id == id).returning(Novelists.id)
+    )
+    if not deleted:
+        await db.rollback()
         raise NovelistNotFound
-    db.delete(novelist)
-    db.commit()
+    await db.commit()
+    await invalidate_novelists(id)
+    await invalidate_books(*book_ids)
     return
 
 
-def update_novelist_service(id: int, data: NovelistRequestSchema, db: Session):
-    novelist = db.get(Novelists, id)
-    if not novelist:
-        raise NovelistNotFound
-    if novelist.name == sanitize_str(data.name):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail='Romancista já consta no MADR',
+async def update_novelist_service(
+    id: int, data: NovelistRequestSchema, db: AsyncSession
+):
+    name = sanitize_str(data.name)
+    try:
+        novelist = await db.scalar(
+            update(Novelists)
+            .where(Novelists.id == id, Novelists.name != name)
+            .values(name=name)
+            .returning(Novelists)
         )
-    novelist.name = sanitize_str(data.name)
-    db.commit()
-    db.refresh(novelist)
+    except IntegrityError as e:
+        await db.rollback()
+        raise NovelistConflict from e
+    if not novelist:
+        if not await db.scalar(select(Novelists.id).where(Novelists.id == id)):
+            raise NovelistNotFound
+        raise NovelistConflict
+    await db.commit()
+    await invalidate_novelists(id)
     return novelist
 
 
-def get_novelist_service(where: NovelistWhere, db: Session):
-    if not where:
-        return None   # pragma: no cover
-    novelist = db.scalar(select(Novelists).filter_by(**where))
-    if not novelist:
+async def get_novelists_version_service(
+    where: NovelistWhere,
+    db: AsyncSession,
+    page: int = 1,
+    cursor: str | None = None,
+) -> Page[NovelistRecord]:
+    """The same page with only ``id`` and ``updated_at``, for list ETags."""
+    return await get_novelists_service(dict(where), db, page, cursor, ())
+
+
+async def get_novelist_service(
+    id: int,
+    db: AsyncSession,
+    fields: tuple[str, ...] | None = None,
+    updated_at: datetime | None = None,
+) -> NovelistRecord:
+    """The cached record, or only the columns of ``fields`` on a miss.
+
+    A cached record older than a known ``updated_at`` is read again.
+    """
+    novelist = await novelist_cache.get(id)
+    if novelist and updated_at in (None, novelist.updated_at):
+        return novelist
+    # taken before the query, so a write racing it keeps the row uncached
+    generation = await novelist_cache.generation() if fields is None else None
+    result = await db.execute(select_records(fields).where(Novelists.id == id))
+    row = result.first()
+    if not row:
         raise NovelistNotFound
+    novelist = NovelistRecord(*row)
+    await novelist_cache.set(novelist, generation)
     return novelist
 
 
-def get_novelists_service(where: NovelistWhere, db: Session, page: int = 1):
+async def get_novelists_service(
+    where: NovelistWhere,
+    db: AsyncSession,
+    page: int = 1,
+    cursor: str | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> Page[NovelistRecord]:
     if not where:
-        return []  # pragma: no cover
-    query = (
-        select(Novelists).filter_by(**where).limit(20).offset((page - 1) * 20)
-    )
+        return Page([])  # pragma: no cover
     name = where.pop('name', None)
     if name:
         name = sanitize_str(name)
+    key = await novelist_search_cache.key(
+        name, where, None if cursor else page, cursor, fields
+    )
+    result = await novelist_search_cache.get(key)
+    if result is not None:
+        return result
+
+    query = select_records(fields)
+    if name:
+        query = query.filter(await contains(db, Novelists.name, name))
+    query = query.filter_by(**where)
+    novelists = await paginate(
+        db, query, Novelists.id, page, cursor, rows=True
+    )
+    result = Page(
+        list(starmap(NovelistRecord, novelists.items)), novelists.next_cursor
+    )
+    await novelist_search_cache.set(key, result)
+    return result
+
+
+async def get_novelist_version_service(id: int, db: AsyncSession) -> datetime:
+    """Only ``updated_at``, to answer conditional requests cheaply.
+
+    Read from the database, not the record cache: a per-process cache
+    misses the writes handled by other workers.
+    """
+    updated_at = await db.scalar(
+        select(Novelists.updated_at).where(Novelists.id == id)
+    )
+    if updated_at is None:
+        raise NovelistNotFound
+    return updated_at
+
+
+async def export_novelists_service(
+    where: NovelistWhere,
+    session_maker: async_sessionmaker[AsyncSession],
+    fields: tuple[str, ...] | None = None,
+) -> AsyncIterator[list[NovelistRecord]]:
+    """Every novelist matching ``where``, in batches from a server cursor.
+
+    The session is opened here, not by the route, so it lives as long as
+    the response is being streamed.
+    """
+    name = where.pop('name', None)
+    async with session_maker() as db:
+        query = select_records(fields)
+        if name:
+            query = query.filter(
+                await contains(db, Novelists.name, sanitize_str(name))
+            )
         query = (
-            select(Novelists)
-            .filter(Novelists.name.like(f'%{name}%'))
-            .limit(20)
-            .offset((page - 1) * 20)
+            query.filter_by(**where)
+            .order_by(Novelists.id)
+            .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
         )
-
-    novelists = db.scalars(query).all()
-    return novelists
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield list(starmap(NovelistRecord, rows))
@@ -1,48 +1,93 @@
+import asyncio
+from contextlib import contextmanager
 from http import HTTPStatus
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
 
-from madr.database import get_session
+from madr.database import get_session_maker
+from madr.database.database import create_session_maker
 from madr.database.models import User, table_registry
-from madr.server import app
+from madr.database.queries import count_queries, listen_query_events
+from madr.server import app, profiles
+from madr.server.services.auth_service import user_cache
+from madr.tools.cache import cache_backend
 from madr.tools.hash import hash_pwd
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    user_cache.clear()
+    asyncio.run(cache_backend.clear())
+
+
 @pytest.fixture()
-def client(session: Session):
-    def get_session_override():
-        return session
+def async_engine(database_path: Path):
+    async_engine = create_async_engine(f'sqlite+aiosqlite:///{database_path}')
+    listen_query_events(async_engine)
+    return async_engine
+
+
+@pytest.fixture()
+def client(async_engine, session: Session, tmp_path: Path, monkeypatch):
+    session_maker = create_session_maker(async_engine)
+    monkeypatch.setattr(profiles, 'path', tmp_path / 'profiles.folded')
 
     with TestClient(app) as client:
-        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_session_maker] = lambda: session_maker
         yield client
+        client.portal.call(async_engine.dispose)
 
     app.dependency_overrides.clear()
+    profiles.stacks.clear()
+    profiles.samples = 0
 
 
 @pytest.fixture()
-def session():
-    engine = create_engine(
-        'sqlite:///:memory:',
-        connect_args={'check_same_thread': False},
-        poolclass=StaticPool,
-    )
+def max_queries(async_engine):
+    """Fail when the block runs more than ``limit`` statements."""
+
+    @contextmanager
+    def assert_max_queries(limit: int):
+        with count_queries(async_engine) as stats:
+            yield stats
+        assert (
+            stats.count <= limit
+        ), f'{stats.count} queries, expected at most {limit}:\n' + '\n'.join(
+            stats.statements
+        )
+
+    return assert_max_queries
+
+
+@pytest.fixture()
+def database_path(tmp_path: Path) -> Path:
+    return tmp_path / 'db.sqlite3'
+
+
+@pytest.fixture()
+def session(database_path: Path):
+    engine = create_engine(f'sqlite:///{database_path}')
     table_registry.metadata.create_all(engine)
 
     with Session(engine) as session:
         yield session
 
     table_registry.metadata.drop_all(engine)
+    engine.dispose()
 
 
 @pytest.fixture()
 def user(session: Session):
+    # already sanitized, as the API stores it: this session no longer
+    # sees the app's writes, so ``user.username`` is not reloaded
     user = User(
-        username='Teste',
+        username='teste',
         email='teste@test.com',
         password=hash_pwd('testtest'),
     )
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from madr.database.models import User
+from madr.tools import hash
 from madr.tools.hash import is_hashed_pwd
 
 
@@ -67,6 +68,24 @@ class TestCreateUser:
         response = client.post('/contas/conta', json=user)
         assert response.status_code == HTTPStatus.CONFLICT
 
+    def test_create_user_conflict_skips_hash(
+        self, client: TestClient, user: User, monkeypatch
+    ):
+        async def fail(pwd):  # pragma: no cover
+            raise AssertionError('hashed a conflicting account')
+
+        monkeypatch.setattr(hash, 'async_hash_pwd', fail)
+        response = client.post(
+            '/contas/conta',
+            json={
+                'username': user.username,
+                'email': 'outro@madr.com',
+                'senha': '1234567',
+            },
+        )
+        assert response.status_code == HTTPStatus.CONFLICT
+        assert response.json()['detail'] == 'Conta já consta no MADR'
+
 
 class TestUpdateUser:
     def test_update_user(self, client: TestClient, user: User, token: str):
@@ -131,6 +150,23 @@ class TestUpdateUser:
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
 
+    def test_update_user_with_email_of_another_user_conflict(
+        self, client: TestClient, user: User, token: str
+    ):
+        other = {
+            'username': 'outro',
+            'email': 'outro@email.com',
+            'senha': '1234567',
+        }
+        response = client.post('/contas/conta', json=other)
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.put(
+            f'/contas/conta/{user.id}',
+            headers={'Authorization': f'Bearer {token}'},
+            json={**other, 'username': user.username},
+        )
+        assert response.status_code == HTTPStatus.CONFLICT
+
 
 class TestDeleteUser:
     def test_delete_user(self, client: TestClient, token: str):
@@ -3,10 +3,13 @@ from http import HTTPStatus
 
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
+from sqlalchemy.orm import Session
 
 from madr.database.models import User
 from madr.infra import config
-from madr.tools import security
+from madr.server.services.auth_service import user_cache
+from madr.tools import hash, security
+from madr.tools.hash import check_pwd, get_hash_rounds, hash_pwd
 
 
 class TestAuth:
@@ -95,3 +98,67 @@ class TestAuth:
             headers={'Authorization': f'Bearer {deleted_user_token}'},
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_get_current_user_is_cached(
+        self, client: TestClient, user: User, token: str
+    ):
+        for _ in range(2):
+            response = client.post(
+                '/contas/refresh-token',
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == HTTPStatus.OK
+        assert user_cache.get(user.email).id == user.id
+        assert user_cache.hits >= 1
+
+    def test_get_current_user_cache_invalidated_on_update(
+        self, client: TestClient, user: User, token: str
+    ):
+        response = client.put(
+            f'/contas/conta/{user.id}',
+            headers={'Authorization': f'Bearer {token}'},
+            json={
+                'username': user.username,
+                'email': 'novo@email.com',
+                'senha': 'newPassword',
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_cache.get(user.email) is None
+
+        response = client.post(
+            '/contas/refresh-token',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_login_rehashes_password_with_outdated_rounds(
+        self, client: TestClient, session: Session, user: User
+    ):
+        user.password = hash_pwd(user.clean_password, rounds=4)
+        session.commit()
+
+        login = {'username': user.email, 'password': user.clean_password}
+        response = client.post('/contas/token', data=login)
+        assert response.status_code == HTTPStatus.OK
+
+        session.refresh(user)
+        assert get_hash_rounds(user.password) == config.AUTH_BCRYPT_ROUNDS
+        assert check_pwd(user.clean_password, user.password)
+
+    def test_login_skips_rehash_when_hash_pool_is_full(
+        self, client: TestClient, session: Session, user: User, monkeypatch
+    ):
+        user.password = hash_pwd(user.clean_password, rounds=4)
+        session.commit()
+
+        async def saturated(pwd):
+            raise hash.HashPoolSaturatedException
+
+        monkeypatch.setattr(hash, 'async_hash_pwd', saturated)
+        login = {'username': user.email, 'password': user.clean_password}
+        response = client.post('/contas/token', data=login)
+        assert response.status_code == HTTPStatus.OK
+
+        session.refresh(user)
+        assert get_hash_rounds(user.password) == 4
@@ -0,0 +1,44 @@
+from benchmarks.micro import find_regressions
+from benchmarks.stats import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_counts_unexpected_statuses():
+    summary = summarize(
+        [0.010, 0.020, 0.030, 0.040],
+        [200, 200, 404, 200],
+        elapsed=0.5,
+        expected_status=200,
+        concurrency=2,
+    )
+    assert summary['requests'] == 4
+    assert summary['errors'] == 1
+    assert summary['status_codes'] == {'200': 3, '404': 1}
+    assert summary['rps'] == 8.0
+    assert summary['latency_ms']['p50'] == 20.0
+    assert summary['latency_ms']['max'] == 40.0
+
+
+def test_compare_reports():
+    def report(p95, rps):
+        return {'routes': {'GET /': {'latency_ms': {'p95': p95}, 'rps': rps}}}
+
+    (row,) = compare(report(10.0, 100.0), report(12.0, 80.0))
+    assert row['route'] == 'GET /'
+    assert row['p95_change'] == 20.0
+    assert row['rps_change'] == -20.0
+
+
+def test_find_regressions_over_threshold():
+    baseline = {'fast': 1.0, 'slow': 1.0, 'new': None}
+    current = {'fast': 1.1, 'slow': 1.5, 'new': 2.0, 'unknown': 3.0}
+    regressions = find_regressions(baseline, current, threshold=0.25)
+    assert list(regressions) == ['slow']
+    assert round(regressions['slow'], 2) == 0.5
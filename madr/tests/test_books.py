@@ -1,8 +1,33 @@
+import asyncio
+import csv
+import io
+import json
 from http import HTTPStatus
 from urllib.parse import urlencode
 
 from fastapi.testclient import TestClient
+from sqlalchemy import Insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from madr.database import search
+from madr.database.database import create_session_maker
+from madr.database.models import Book
+from madr.database.search import create_search_indexes
+from madr.infra import config
+from madr.server.schemas.books import UpdateBookRequestSchema
+from madr.server.services.book_service import (
+    BookRecord,
+    book_cache,
+    book_search_cache,
+    export_books_service,
+    get_book_service,
+    get_books_service,
+    update_book_service,
+)
+from madr.tools.bulk import BATCH_REFUSED
+from madr.tools.export import export_limiter
 from madr.tools.sanitize import sanitize_str
 
 
@@ -67,6 +92,7 @@ class TestCreateBook:
             headers={'Authorization': f'Bearer {token}'},
         )
         assert response.status_code == HTTPStatus.CONFLICT
+        assert response.json()['detail'] == 'Livro já cadastrado'
 
 
 class TestDeleteBook:
@@ -176,6 +202,24 @@ class TestUpdatebook:
         )
         assert response.status_code == HTTPStatus.CONFLICT
 
+    def test_update_book_with_title_of_another_book_conflict(
+        self, client: TestClient, token: str
+    ):
+        headers = {'Authorization': f'Bearer {token}'}
+        book = {'ano': 1881, 'titulo': 'Memórias Póstumas', 'romancista_id': 1}
+        response = client.post('/livros/livro', json=book, headers=headers)
+        assert response.status_code == HTTPStatus.CREATED
+        other = {'ano': 1900, 'titulo': 'Dom Casmurro', 'romancista_id': 1}
+        response = client.post('/livros/livro', json=other, headers=headers)
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = client.patch(
+            f'/livros/livro/{response.json()["id"]}',
+            json=book,
+            headers=headers,
+        )
+        assert response.status_code == HTTPStatus.CONFLICT
+
 
 class TestGetbook:
     def test_get_book(self, client: TestClient, token: str):
@@ -248,7 +292,7 @@ class TestGetbook:
         response = client.get(f'/livros/livro?{filters}')
         assert response.status_code == HTTPStatus.OK
         res_json = response.json()
-        assert res_json == {'livros': []}
+        assert res_json == {'livros': [], 'next_cursor': None}
 
     def test_pagination_on_get_book_using_query(self, client, token: str):
         book = {
@@ -277,3 +321,619 @@ class TestGetbook:
         res_json_page_2 = response.json()
 
         assert res_json_page_1['livros'] != res_json_page_2['livros']
+
+    def test_cursor_pagination_on_get_books(self, client, token: str):
+        for i in range(1, 26):
+            response = client.post(
+                '/livros/livro',
+                json={
+                    'ano': 2001,
+                    'titulo': f'Senhor dos Aneis {i}',
+                    'romancista_id': 7,
+                },
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == HTTPStatus.CREATED
+
+        filters = urlencode({'titulo': 'aneis'})
+        response = client.get(f'/livros/livro?{filters}')
+        page_1 = response.json()
+        assert len(page_1['livros']) == 20
+        assert page_1['next_cursor']
+
+        filters = urlencode(
+            {'titulo': 'aneis', 'cursor': page_1['next_cursor']}
+        )
+        response = client.get(f'/livros/livro?{filters}')
+        assert response.status_code == HTTPStatus.OK
+        page_2 = response.json()
+        assert len(page_2['livros']) == 5
+        assert page_2['next_cursor'] is None
+        ids = [book['id'] for book in page_1['livros'] + page_2['livros']]
+        assert ids == sorted(set(ids))
+
+    def test_get_books_invalid_cursor(self, client: TestClient):
+        filters = urlencode({'titulo': 'aneis', 'cursor': 'invalido'})
+        response = client.get(f'/livros/livro?{filters}')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_get_books_uses_search_index(
+        self, client: TestClient, session: Session, token: str
+    ):
+        create_search_indexes(session.connection())
+        session.commit()
+        for title in ['Dom Casmurro', 'Memórias Póstumas', 'Casa Velha']:
+            response = client.post(
+                '/livros/livro',
+                json={'ano': 1899, 'titulo': title, 'romancista_id': 1},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == HTTPStatus.CREATED
+
+        for term, expected in [('casmur', 1), ('cas', 2), ('a', 3)]:
+            filters = urlencode({'titulo': term})
+            response = client.get(f'/livros/livro?{filters}')
+            assert response.status_code == HTTPStatus.OK
+            assert len(response.json()['livros']) == expected
+
+    def test_search_index_created_while_running_is_picked_up(
+        self, client: TestClient, session: Session, max_queries, monkeypatch
+    ):
+        client.get('/livros/livro?titulo=casmurro')
+        create_search_indexes(session.connection())
+        session.commit()
+
+        with max_queries(2) as stats:
+            client.get('/livros/livro?titulo=asmurro')
+        assert 'books_fts' not in ''.join(stats.statements)
+
+        monkeypatch.setattr(search, 'FTS_RECHECK_SECONDS', 0)
+        with max_queries(3) as stats:
+            client.get('/livros/livro?titulo=smurro')
+        assert 'books_fts' in ''.join(stats.statements)
+
+    def test_get_books_query_budget(
+        self, client: TestClient, token: str, max_queries
+    ):
+        for n in range(5):
+            response = client.post(
+                '/livros/livro',
+                json={'ano': 1899, 'titulo': f'livro {n}', 'romancista_id': 1},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == HTTPStatus.CREATED
+        # the first search also looks up the search index once per engine
+        client.get('/livros/livro?titulo=livro')
+
+        with max_queries(1):
+            response = client.get('/livros/livro?titulo=livro')
+        assert len(response.json()['livros']) == 5
+
+        with max_queries(1):
+            response = client.get('/livros/livro/1')
+        assert response.status_code == HTTPStatus.OK
+
+
+class TestConditionalGetBook:
+    def _create(self, client: TestClient, token: str) -> int:
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        return response.json()['id']
+
+    def test_get_book_with_matching_etag(
+        self, client: TestClient, token: str, max_queries
+    ):
+        id = self._create(client, token)
+        response = client.get(f'/livros/livro/{id}')
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'no-cache'
+        assert response.headers['Last-Modified']
+
+        with max_queries(1):
+            response = client.get(
+                f'/livros/livro/{id}', headers={'If-None-Match': etag}
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.headers['ETag'] == etag
+        assert not response.content
+
+    def test_update_changes_etag(self, client: TestClient, token: str):
+        id = self._create(client, token)
+        etag = client.get(f'/livros/livro/{id}').headers['ETag']
+
+        client.patch(
+            f'/livros/livro/{id}',
+            json={'ano': 1900, 'titulo': 'Esaú e Jacó', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        response = client.get(
+            f'/livros/livro/{id}', headers={'If-None-Match': etag}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['ETag'] != etag
+        assert response.json()['titulo'] == 'esaú e jacó'
+
+    def test_conditional_get_sees_writes_of_other_workers(
+        self, client: TestClient, token: str, session: Session
+    ):
+        id = self._create(client, token)
+        etag = client.get(f'/livros/livro/{id}').headers['ETag']
+        # another worker updates the book; this one's cache is not told
+        book = session.get(Book, id)
+        book.title = 'quincas borba'
+        session.commit()
+
+        response = client.get(
+            f'/livros/livro/{id}', headers={'If-None-Match': etag}
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['ETag'] != etag
+        assert response.json()['titulo'] == 'quincas borba'
+
+    def test_get_book_if_modified_since(self, client: TestClient, token: str):
+        id = self._create(client, token)
+        last_modified = client.get(f'/livros/livro/{id}').headers[
+            'Last-Modified'
+        ]
+
+        response = client.get(
+            f'/livros/livro/{id}',
+            headers={'If-Modified-Since': last_modified},
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = client.get(
+            f'/livros/livro/{id}',
+            headers={'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_conditional_get_book_not_found(self, client: TestClient):
+        response = client.get(
+            '/livros/livro/0', headers={'If-None-Match': '"etag"'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_get_books_with_matching_etag(
+        self, client: TestClient, token: str
+    ):
+        self._create(client, token)
+        response = client.get('/livros/livro?titulo=dom')
+        etag = response.headers['ETag']
+
+        response = client.get(
+            '/livros/livro?titulo=dom', headers={'If-None-Match': etag}
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = client.get(
+            '/livros/livro?titulo=casmurro', headers={'If-None-Match': etag}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_get_books_revalidation_reads_only_versions(
+        self, client: TestClient, token: str, max_queries
+    ):
+        self._create(client, token)
+        etag = client.get('/livros/livro?ano=1899').headers['ETag']
+        client.portal.call(book_search_cache.bump)
+
+        with max_queries(1) as stats:
+            response = client.get(
+                '/livros/livro?ano=1899', headers={'If-None-Match': etag}
+            )
+
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        [statement] = stats.statements
+        assert 'books.title' not in statement
+
+
+class TestBookCache:
+    def test_get_book_is_cached_until_updated(
+        self, client: TestClient, token: str, max_queries
+    ):
+        headers = {'Authorization': f'Bearer {token}'}
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers=headers,
+        )
+        id = response.json()['id']
+        client.get(f'/livros/livro/{id}')
+
+        with max_queries(0):
+            response = client.get(f'/livros/livro/{id}')
+        assert response.json()['titulo'] == 'dom casmurro'
+
+        client.patch(
+            f'/livros/livro/{id}',
+            json={'ano': 1899, 'titulo': 'Quincas Borba', 'romancista_id': 1},
+            headers=headers,
+        )
+        response = client.get(f'/livros/livro/{id}')
+        assert response.json()['titulo'] == 'quincas borba'
+
+        client.delete(f'/livros/livro/{id}', headers=headers)
+        response = client.get(f'/livros/livro/{id}')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_read_racing_an_update_is_not_cached(
+        self, client: TestClient, token: str, async_engine
+    ):
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        id = response.json()['id']
+        session_maker = create_session_maker(async_engine)
+
+        async def scenario():
+            async with session_maker() as db:
+                execute = db.execute
+
+                async def racing_execute(*args, **kwargs):
+                    # the row is read, then a write commits before the set
+                    result = await execute(*args, **kwargs)
+                    async with session_maker() as writer:
+                        await update_book_service(
+                            id,
+                            UpdateBookRequestSchema(
+                                ano=1891,
+                                titulo='Quincas Borba',
+                                romancista_id=1,
+                            ),
+                            writer,
+                        )
+                    return result
+
+                db.execute = racing_execute
+                stale = await get_book_service(id, db)
+            return stale, await book_cache.get(id)
+
+        stale, cached = client.portal.call(scenario)
+
+        assert stale.title == 'dom casmurro'
+        assert cached is None
+        response = client.get(f'/livros/livro/{id}')
+        assert response.json()['titulo'] == 'quincas borba'
+
+    def test_search_is_cached_until_a_book_changes(
+        self, client: TestClient, token: str, max_queries
+    ):
+        headers = {'Authorization': f'Bearer {token}'}
+        client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers=headers,
+        )
+        client.get('/livros/livro?titulo=Casmurro')
+
+        with max_queries(0):
+            # same filters once sanitized
+            response = client.get('/livros/livro?titulo=CASMURRO!')
+        assert len(response.json()['livros']) == 1
+
+        client.post(
+            '/livros/livro',
+            json={'ano': 1900, 'titulo': 'Casmurro II', 'romancista_id': 1},
+            headers=headers,
+        )
+        response = client.get('/livros/livro?titulo=casmurro')
+        assert len(response.json()['livros']) == 2
+
+
+class TestSparseFieldsets:
+    def _create(self, client: TestClient, token: str) -> int:
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        return response.json()['id']
+
+    def test_get_books_selects_only_requested_columns(
+        self, client: TestClient, token: str, max_queries
+    ):
+        id = self._create(client, token)
+        client.get('/livros/livro?titulo=casmurro')
+
+        with max_queries(1) as stats:
+            response = client.get(
+                '/livros/livro?titulo=casmurro&campos=titulo'
+            )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'livros': [{'titulo': 'dom casmurro'}],
+            'next_cursor': None,
+        }
+        (statement,) = stats.statements
+        columns = statement.split(' FROM ')[0]
+        assert 'title' in columns
+        assert 'year' not in columns
+        assert 'author_id' not in columns
+
+        response = client.get(
+            '/livros/livro?titulo=casmurro&campos=id,romancista_id'
+        )
+        assert response.json()['livros'] == [{'id': id, 'romancista_id': 1}]
+
+    def test_get_book_with_fields(self, client: TestClient, token: str):
+        id = self._create(client, token)
+
+        response = client.get(f'/livros/livro/{id}?campos=ano,titulo')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'ano': 1899, 'titulo': 'dom casmurro'}
+        full = client.get(f'/livros/livro/{id}')
+        assert full.headers['ETag'] != response.headers['ETag']
+        response = client.get(
+            f'/livros/livro/{id}?campos=ano,titulo',
+            headers={'If-None-Match': response.headers['ETag']},
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        # served from the record cache filled by the full read
+        response = client.get(f'/livros/livro/{id}?campos=romancista_id')
+        assert response.json() == {'romancista_id': 1}
+
+    def test_unknown_field(self, client: TestClient):
+        response = client.get('/livros/livro?titulo=a&campos=titulo,editora')
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'detail': 'Campo desconhecido em campos'}
+
+
+class TestExportBooks:
+    def _create(self, client: TestClient, token: str):
+        for n, title in enumerate(['Dom Casmurro', 'Quincas Borba', 'Helena']):
+            client.post(
+                '/livros/livro',
+                json={'ano': 1880 + n, 'titulo': title, 'romancista_id': 1},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+
+    def test_export_ndjson(self, client: TestClient, token: str):
+        self._create(client, token)
+
+        response = client.get('/livros/export')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        assert 'livros.ndjson' in response.headers['content-disposition']
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [book['titulo'] for book in lines] == [
+            'dom casmurro',
+            'quincas borba',
+            'helena',
+        ]
+        assert lines[0] == {
+            'ano': 1880,
+            'titulo': 'dom casmurro',
+            'romancista_id': 1,
+            'id': 1,
+        }
+
+    def test_export_csv_with_filters_and_fields(
+        self, client: TestClient, token: str
+    ):
+        self._create(client, token)
+
+        response = client.get(
+            '/livros/export?formato=csv&titulo=borba&campos=id,titulo'
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['content-type'].startswith('text/csv')
+        assert list(csv.reader(io.StringIO(response.text))) == [
+            ['titulo', 'id'],
+            ['quincas borba', '2'],
+        ]
+
+    def test_export_empty_csv_has_header(self, client: TestClient):
+        response = client.get('/livros/export?formato=csv')
+
+        assert response.text.splitlines() == ['ano,titulo,romancista_id,id']
+
+    def test_export_is_read_in_batches(
+        self, client: TestClient, token: str, async_engine, monkeypatch
+    ):
+        self._create(client, token)
+        monkeypatch.setattr(config, 'EXPORT_BATCH_SIZE', 2)
+        session_maker = create_session_maker(async_engine)
+
+        async def batch_sizes():
+            return [
+                len(batch)
+                async for batch in export_books_service({}, session_maker)
+            ]
+
+        assert asyncio.run(batch_sizes()) == [2, 1]
+
+    def test_export_refused_while_the_limit_is_taken(
+        self, client: TestClient, monkeypatch
+    ):
+        monkeypatch.setattr(config, 'EXPORT_MAX_CONCURRENT', 1)
+        export_limiter.acquire()
+        try:
+            response = client.get('/livros/export')
+        finally:
+            export_limiter.release()
+
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert response.headers['Retry-After'] == '5'
+        response = client.get('/livros/export')
+        assert response.status_code == HTTPStatus.OK
+        assert export_limiter.active == 0
+
+
+class TestBookRecords:
+    def test_reads_return_records_with_pruned_columns(
+        self, client: TestClient, token: str, async_engine
+    ):
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        id = response.json()['id']
+        session_maker = create_session_maker(async_engine)
+
+        async def read():
+            async with session_maker() as db:
+                book = await get_book_service(id, db, ('title',))
+                page = await get_books_service({'year': 1899}, db, 1, None, ())
+            return book, page
+
+        book, page = client.portal.call(read)
+
+        assert type(book) is BookRecord
+        assert book.title == 'dom casmurro'
+        assert book.year is book.author_id is None
+        [item] = page.items
+        assert type(item) is BookRecord
+        assert item.id == id
+        assert item.title is item.year is item.author_id is None
+
+    def test_caches_round_trip_records(
+        self, client: TestClient, token: str, async_engine
+    ):
+        response = client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        id = response.json()['id']
+        session_maker = create_session_maker(async_engine)
+
+        async def read():
+            async with session_maker() as db:
+                book = await get_book_service(id, db)
+                page = await get_books_service({'year': 1899}, db)
+            key = await book_search_cache.key(
+                None, {'year': 1899}, 1, None, None
+            )
+            return (
+                book,
+                page,
+                await book_cache.get(id),
+                await book_search_cache.get(key),
+            )
+
+        book, page, cached_book, cached_page = client.portal.call(read)
+
+        assert type(cached_book) is BookRecord
+        assert cached_book == book
+        assert type(cached_page.items[0]) is BookRecord
+        assert cached_page == page
+
+
+class TestBulkCreateBooks:
+    def test_bulk_create_books(
+        self, client: TestClient, token: str, monkeypatch
+    ):
+        monkeypatch.setattr(config, 'BULK_BATCH_SIZE', 2)
+        headers = {'Authorization': f'Bearer {token}'}
+        client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Machado de Assis'},
+            headers=headers,
+        )
+        client.post(
+            '/livros/livro',
+            json={'ano': 1899, 'titulo': 'Dom Casmurro', 'romancista_id': 1},
+            headers=headers,
+        )
+        client.get('/livros/livro?ano=1881')
+        lines = [
+            {'ano': 1881, 'titulo': 'Memórias Póstumas!', 'romancista_id': 1},
+            # repeated in the same batch
+            {'ano': 1881, 'titulo': 'memórias póstumas', 'romancista_id': 1},
+            {'ano': 1891, 'titulo': 'Quincas Borba', 'romancista_id': 99},
+            {'ano': 'mil', 'titulo': 'Helena', 'romancista_id': 1},
+            # already in the MADR
+            {'ano': 1899, 'titulo': 'DOM CASMURRO', 'romancista_id': 1},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines)
+        body += (
+            '\n\n{"ano": 1872, "titulo": "Ressurreição", "romancista_id": 1}'
+        )
+
+        response = client.post(
+            '/livros/bulk',
+            content=body,
+            headers={**headers, 'Content-Type': 'application/x-ndjson'},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        report = response.json()
+        assert report['criados'] == 2
+        assert report['conflitos'] == 2
+        assert report['erros'] == 2
+        assert [(row['linha'], row['status']) for row in report['linhas']] == [
+            (1, 'criado'),
+            (2, 'conflito'),
+            (3, 'erro'),
+            (4, 'erro'),
+            (5, 'conflito'),
+            (7, 'criado'),
+        ]
+        assert (
+            report['linhas'][2]['detail']
+            == 'Romancista não encontrado no MADR'
+        )
+        assert report['linhas'][3]['detail'].startswith('ano: ')
+        # the search cache was bumped by the import
+        response = client.get('/livros/livro?ano=1881')
+        assert [book['titulo'] for book in response.json()['livros']] == [
+            'memórias póstumas'
+        ]
+
+    def test_bulk_batch_refused_by_the_database(
+        self, client: TestClient, token: str, monkeypatch
+    ):
+        monkeypatch.setattr(config, 'BULK_BATCH_SIZE', 1)
+        headers = {'Authorization': f'Bearer {token}'}
+        client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Machado de Assis'},
+            headers=headers,
+        )
+        execute = AsyncSession.execute
+        failures = iter([True])
+
+        async def execute_once_failing(self, statement, *args, **kwargs):
+            # the novelist is deleted between the check and the insert
+            if isinstance(statement, Insert) and next(failures, False):
+                raise IntegrityError(str(statement), {}, Exception('FK'))
+            return await execute(self, statement, *args, **kwargs)
+
+        monkeypatch.setattr(AsyncSession, 'execute', execute_once_failing)
+        body = (
+            '{"ano": 1899, "titulo": "Dom Casmurro", "romancista_id": 1}\n'
+            '{"ano": 1891, "titulo": "Quincas Borba", "romancista_id": 1}\n'
+        )
+
+        response = client.post(
+            '/livros/bulk',
+            content=body,
+            headers={**headers, 'Content-Type': 'application/x-ndjson'},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        report = response.json()
+        assert [(row['linha'], row['status']) for row in report['linhas']] == [
+            (1, 'erro'),
+            (2, 'criado'),
+        ]
+        assert report['linhas'][0]['detail'] == BATCH_REFUSED
+
+    def test_bulk_create_books_invalid_token(self, client: TestClient):
+        response = client.post('/livros/bulk', content='{}')
+
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
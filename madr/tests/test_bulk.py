@@ -0,0 +1,80 @@
+import asyncio
+
+from madr.server.schemas.novelist import NovelistRequestSchema
+from madr.tools.bulk import ndjson_lines, read_batches
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_ndjson_lines_split_across_chunks():
+    async def read():
+        return [
+            line
+            async for line in ndjson_lines(
+                _chunks(b'{"a":', b' 1}\n\n{"b"', b': 2}\n', b'{"c": 3}'),
+                max_bytes=100,
+            )
+        ]
+
+    assert asyncio.run(read()) == [
+        (1, b'{"a": 1}'),
+        (3, b'{"b": 2}'),
+        (4, b'{"c": 3}'),
+    ]
+
+
+def test_ndjson_lines_skip_lines_over_the_limit():
+    async def read():
+        return [
+            line
+            async for line in ndjson_lines(
+                _chunks(
+                    b'{"a": 1}\n' + b'x' * 8,
+                    b'x' * 8 + b'\n{"b": 2}\n' + b'y' * 12 + b'\n',
+                    b'z' * 20,
+                ),
+                max_bytes=10,
+            )
+        ]
+
+    assert asyncio.run(read()) == [
+        (1, b'{"a": 1}'),
+        (2, None),
+        (3, b'{"b": 2}'),
+        (4, None),
+        (5, None),
+    ]
+
+
+def test_read_batches():
+    body = b'{"nome": "a"}\n{"nome": "b"}\nnot json\n{"nome": "c"}\n'
+
+    async def read():
+        return [
+            ([line for line, _ in rows], [error.line for error in errors])
+            async for rows, errors in read_batches(
+                _chunks(body), NovelistRequestSchema, 2, 100
+            )
+        ]
+
+    assert asyncio.run(read()) == [([1, 2], []), ([4], [3])]
+
+
+def test_read_batches_report_long_lines():
+    body = b'{"nome": "a"}\n{"nome": "' + b'b' * 200 + b'"}\n'
+
+    async def read():
+        return [
+            (rows, errors)
+            async for rows, errors in read_batches(
+                _chunks(body), NovelistRequestSchema, 2, 100
+            )
+        ]
+
+    [(rows, [error])] = asyncio.run(read())
+    assert [line for line, _ in rows] == [1]
+    assert (error.line, error.status) == (2, 'erro')
+    assert error.detail == 'Linha maior que 100 bytes'
@@ -0,0 +1,275 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from madr.infra import Configs
+from madr.tools.cache import (
+    SET_IF_SCRIPT,
+    MemoryBackend,
+    RecordCache,
+    RedisBackend,
+    SearchCache,
+    TTLCache,
+    search_cache_ttl,
+)
+from madr.tools.pagination import Page
+from madr.tools.redis import RedisClient, encode_command
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expires_entries():
+    with freeze_time('2024-06-23 12:00:00') as frozen:
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=10)
+        frozen.tick(11)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        frozen.tick(50)
+        assert cache.get('a') is None
+
+
+def test_ttl_cache_delete():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.delete('a')
+    cache.delete('missing')
+    assert cache.get('a') is None
+
+
+class FakeRedisServer:
+    """Stand-in speaking enough RESP for the cache backend."""
+
+    def __init__(self):
+        self.data: dict[bytes, bytes] = {}
+        self.commands: list[list[bytes]] = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f'redis://127.0.0.1:{port}/0'
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        while line := await reader.readline():
+            args = []
+            for _ in range(int(line[1:])):
+                size = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(size + 2))[:-2])
+            self.commands.append(args)
+            writer.write(self.reply(args[0].upper(), args[1:]))
+            await writer.drain()
+        writer.close()
+
+    def reply(self, command: bytes, args: list[bytes]) -> bytes:
+        if command == b'GET':
+            value = self.data.get(args[0])
+            if value is None:
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == b'SET':
+            self.data[args[0]] = args[1]
+            return b'+OK\r\n'
+        if command == b'EVAL':
+            # only the compare and set script of the record cache
+            key, counter_key, value, expected, ttl = args[2:]
+            if int(self.data.get(counter_key, b'0')) != int(expected):
+                return b'$-1\r\n'
+            return self.reply(b'SET', [key, value, b'PX', ttl])
+        if command == b'INCR':
+            value = int(self.data.get(args[0], b'0')) + 1
+            self.data[args[0]] = b'%d' % value
+            return b':%d\r\n' % value
+        if command == b'DEL':
+            removed = sum(self.data.pop(key, None) is not None for key in args)
+            return b':%d\r\n' % removed
+        if command == b'SCAN':
+            prefix = args[2].rstrip(b'*')
+            keys = [key for key in self.data if key.startswith(prefix)]
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n%s' % (
+                len(keys),
+                b''.join(b'$%d\r\n%s\r\n' % (len(key), key) for key in keys),
+            )
+        return b'-ERR unknown command\r\n'
+
+
+@dataclass(frozen=True, slots=True)
+class Record:
+    id: int
+    name: str
+    updated_at: datetime
+
+
+def test_record_cache_round_trip_on_memory_backend():
+    async def scenario():
+        cache = RecordCache('record', Record, MemoryBackend(10, 60))
+        record = Record(1, 'machado', datetime(2024, 7, 1, 12, 0, 0, 123456))
+
+        assert await cache.get(1) is None
+        await cache.set(record, await cache.generation())
+        assert await cache.get(1) == record
+        await cache.delete(1)
+        assert await cache.get(1) is None
+        return cache.backend.stats
+
+    stats = asyncio.run(scenario())
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_record_cache_drops_a_read_raced_by_a_delete():
+    async def scenario():
+        cache = RecordCache('record', Record, MemoryBackend(10, 60))
+        stale = Record(1, 'machado', datetime(2024, 7, 1))
+
+        generation = await cache.generation()  # reader misses, queries
+        await cache.delete(1)  # a write commits and invalidates
+        await cache.set(stale, generation)  # reader fills with its row
+        assert await cache.get(1) is None
+
+        await cache.set(stale, await cache.generation())
+        assert await cache.get(1) == stale
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_against_stand_in_server():
+    async def scenario():
+        server = FakeRedisServer()
+        url = await server.start()
+        backend = RedisBackend(RedisClient(url), ttl=60, prefix='madr:')
+        cache = RecordCache('record', Record, backend)
+        record = Record(7, 'clarice', datetime(2024, 7, 1))
+
+        await cache.set(record, 0)
+        assert await cache.get(7) == record
+        assert server.commands[0] == [
+            b'EVAL',
+            SET_IF_SCRIPT.encode(),
+            b'2',
+            b'madr:record:7',
+            b'madr:record:generation',
+            b'{"id": 7, "name": "clarice", "updated_at": '
+            b'"2024-07-01T00:00:00"}',
+            b'0',
+            b'60000',
+        ]
+        await cache.delete(7)
+        await cache.set(record, 0)
+        assert await cache.get(7) is None
+        assert await backend.counter('generation') == 0
+        await backend.incr('generation')
+        assert await backend.counter('generation') == 1
+        server.data[b'other:key'] = b'kept'
+        await backend.clear()
+        assert await cache.get(7) is None
+        assert list(server.data) == [b'other:key']
+
+        await backend.close()
+        await server.stop()
+        return backend.stats
+
+    stats = asyncio.run(scenario())
+    assert (stats.hits, stats.misses, stats.errors) == (1, 2, 0)
+
+
+def test_redis_backend_unavailable_is_a_miss():
+    async def scenario():
+        server = FakeRedisServer()
+        url = await server.start()
+        await server.stop()
+        backend = RedisBackend(RedisClient(url), ttl=60)
+
+        await backend.set('key', b'value')
+        assert await backend.get('key') is None
+        return backend.stats
+
+    stats = asyncio.run(scenario())
+    assert (stats.misses, stats.errors) == (1, 2)
+
+
+def test_encode_command():
+    assert encode_command('SET', 'key', b'value', 'PX', 10) == (
+        b'*5\r\n$3\r\nSET\r\n$3\r\nkey\r\n$5\r\nvalue\r\n'
+        b'$2\r\nPX\r\n$2\r\n10\r\n'
+    )
+
+
+def test_search_cache_generation_orphans_old_pages():
+    async def scenario():
+        cache = SearchCache('records', Record, MemoryBackend(10, 60), ttl=30)
+        page = Page([Record(1, 'machado', datetime(2024, 7, 1))], 'cursor')
+
+        key = await cache.key('machado', {'year': 1899}, 1, None)
+        assert await cache.key('machado', {'year': 1899}, 1, None) == key
+        assert await cache.key('machado', {'year': 1900}, 1, None) != key
+        await cache.set(key, page)
+        assert await cache.get(key) == page
+
+        await cache.bump()
+        new_key = await cache.key('machado', {'year': 1899}, 1, None)
+        assert new_key != key
+        assert await cache.get(new_key) is None
+
+    asyncio.run(scenario())
+
+
+def test_search_cache_skips_when_generation_is_unknown():
+    async def scenario():
+        server = FakeRedisServer()
+        url = await server.start()
+        await server.stop()
+        backend = RedisBackend(RedisClient(url), ttl=60)
+        cache = SearchCache('records', Record, backend, ttl=30)
+
+        key = await cache.key('machado')
+        await cache.set(key, Page([]))
+        return key, await cache.get(key)
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_search_cache_is_off_unless_every_worker_shares_it():
+    assert search_cache_ttl(Configs(CACHE_SEARCH_TTL_SECONDS=60)) == 60
+    assert search_cache_ttl(Configs(WEB_CONCURRENCY=4)) == 0
+    assert (
+        search_cache_ttl(
+            Configs(
+                WEB_CONCURRENCY=4,
+                CACHE_BACKEND='redis',
+                CACHE_SEARCH_TTL_SECONDS=60,
+            )
+        )
+        == 60
+    )
+
+    async def scenario():
+        cache = SearchCache('records', Record, MemoryBackend(10, 60), ttl=0)
+        return await cache.key('machado')
+
+    assert asyncio.run(scenario()) is None
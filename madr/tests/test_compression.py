@@ -0,0 +1,170 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from madr.infra import config
+from madr.server.middlewares import CompressionMiddleware
+from madr.server.middlewares.compression import (
+    available_encodings,
+    negotiate,
+)
+
+BODY = 'romance ' * 500
+
+
+@pytest.fixture()
+def compressed_client(monkeypatch):
+    monkeypatch.setattr(config, 'COMPRESSION_MINIMUM_SIZE', 100)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, config=config)
+
+    @app.get('/texto')
+    def text(size: int = len(BODY)):
+        return PlainTextResponse(BODY[:size], headers={'ETag': '"abc"'})
+
+    @app.get('/stream')
+    def stream():
+        return StreamingResponse(
+            (f'{i}\n' for i in range(1000)), media_type='application/x-ndjson'
+        )
+
+    @app.get('/validado')
+    def validated(request: Request):
+        if request.headers.get('if-none-match') == '"abc"':
+            return Response(status_code=304, headers={'ETag': '"abc"'})
+        return PlainTextResponse(BODY, headers={'ETag': '"abc"'})
+
+    @app.get('/sem-transformar')
+    def no_transform():
+        return PlainTextResponse(
+            BODY, headers={'Cache-Control': 'no-cache, no-transform'}
+        )
+
+    @app.get('/imagem')
+    def image():
+        return PlainTextResponse(BODY, media_type='image/png')
+
+    return TestClient(app)
+
+
+def _raw(client: TestClient, path: str, accept_encoding: str):
+    """Headers and body as sent, before httpx decodes them."""
+    with client.stream(
+        'GET', path, headers={'Accept-Encoding': accept_encoding}
+    ) as response:
+        return response.headers, b''.join(response.iter_raw())
+
+
+class TestNegotiate:
+    encodings = {'zstd': None, 'br': None, 'gzip': None}
+
+    def test_prefers_zstd_on_ties(self):
+        assert negotiate('gzip, br, zstd', self.encodings) == 'zstd'
+
+    def test_highest_q_wins(self):
+        assert negotiate('gzip;q=1, br;q=0.5', self.encodings) == 'gzip'
+
+    def test_q_zero_refuses(self):
+        assert negotiate('gzip;q=0', self.encodings) is None
+
+    def test_wildcard(self):
+        assert negotiate('*;q=0.1, zstd;q=0', self.encodings) == 'br'
+
+    def test_identity_only(self):
+        assert negotiate('identity', self.encodings) is None
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.parametrize(
+        ('encoding', 'decompress'),
+        [
+            ('gzip', gzip.decompress),
+            ('br', brotli.decompress),
+            (
+                'zstd',
+                lambda data: zstandard.ZstdDecompressor()
+                .decompressobj()
+                .decompress(data),
+            ),
+        ],
+    )
+    def test_compress_body(self, compressed_client, encoding, decompress):
+        assert encoding in available_encodings()
+
+        response = compressed_client.get(
+            '/texto', headers={'Accept-Encoding': encoding}
+        )
+
+        assert response.headers['content-encoding'] == encoding
+        assert response.headers['vary'] == 'Accept-Encoding'
+        assert response.headers['etag'] == '"abc"'
+        assert response.text == BODY
+        _, raw = _raw(compressed_client, '/texto', encoding)
+        assert len(raw) < len(BODY)
+        assert decompress(raw).decode() == BODY
+
+    def test_small_body_is_not_compressed(self, compressed_client):
+        response = compressed_client.get(
+            '/texto?size=50', headers={'Accept-Encoding': 'gzip'}
+        )
+
+        assert 'content-encoding' not in response.headers
+        assert response.headers['etag'] == '"abc"'
+        assert response.text == BODY[:50]
+
+    def test_without_accept_encoding(self, compressed_client):
+        headers, body = _raw(compressed_client, '/texto', 'identity')
+
+        assert 'content-encoding' not in headers
+        assert body == BODY.encode()
+
+    def test_revalidation_keeps_the_validator(self, compressed_client):
+        response = compressed_client.get(
+            '/validado', headers={'Accept-Encoding': 'gzip'}
+        )
+        assert response.headers['content-encoding'] == 'gzip'
+
+        response = compressed_client.get(
+            '/validado',
+            headers={
+                'Accept-Encoding': 'gzip',
+                'If-None-Match': response.headers['etag'],
+            },
+        )
+
+        assert response.status_code == 304
+        assert response.headers['etag'] == '"abc"'
+        assert response.headers['vary'] == 'Accept-Encoding'
+
+    def test_skip_no_transform(self, compressed_client):
+        headers, body = _raw(compressed_client, '/sem-transformar', 'gzip')
+
+        assert 'content-encoding' not in headers
+        assert body == BODY.encode()
+
+    def test_skip_not_compressible_types(self, compressed_client):
+        headers, _ = _raw(compressed_client, '/imagem', 'gzip')
+
+        assert 'content-encoding' not in headers
+
+    def test_stream_is_compressed_chunk_by_chunk(self, compressed_client):
+        headers, body = _raw(compressed_client, '/stream', 'gzip')
+
+        assert headers['content-encoding'] == 'gzip'
+        assert 'content-length' not in headers
+        expected = ''.join(f'{i}\n' for i in range(1000))
+        assert gzip.decompress(body).decode() == expected
+
+
+def test_api_responses_are_compressed(client: TestClient, monkeypatch):
+    monkeypatch.setattr(config, 'COMPRESSION_MINIMUM_SIZE', 10)
+
+    response = client.get('/docs', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'swagger' in response.text
@@ -0,0 +1,67 @@
+import asyncio
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from madr.infra import config
+from madr.tools.hash import (
+    HashPool,
+    check_pwd,
+    get_hash_rounds,
+    hash_pwd,
+    is_hashed_pwd,
+    needs_rehash,
+)
+
+
+def test_hash_pool_hash_and_check_password():
+    pool = HashPool(workers=1, max_pending=4)
+
+    async def run():
+        hashed = await pool.run(hash_pwd, 'madr')
+        return hashed, await pool.run(check_pwd, 'madr', hashed)
+
+    try:
+        hashed, valid = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    assert is_hashed_pwd(hashed)
+    assert valid
+    assert pool.stats.submitted == pool.stats.completed == 2
+    assert pool.stats.pending == 0
+    assert pool.stats.busy_seconds > 0
+
+
+def test_hash_pool_rejects_when_saturated():
+    pool = HashPool(workers=1, max_pending=1)
+
+    async def run():
+        return await asyncio.gather(
+            pool.run(hash_pwd, 'first'),
+            pool.run(hash_pwd, 'second'),
+            return_exceptions=True,
+        )
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    assert is_hashed_pwd(first)
+    assert isinstance(second, HTTPException)
+    assert second.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert pool.stats.rejected == 1
+
+
+def test_hash_pwd_uses_random_salt_and_configured_rounds():
+    first, second = hash_pwd('madr'), hash_pwd('madr')
+    assert first != second
+    assert get_hash_rounds(first) == config.AUTH_BCRYPT_ROUNDS
+    assert get_hash_rounds(hash_pwd('madr', rounds=4)) == 4
+    assert get_hash_rounds('madr') is None
+
+
+def test_needs_rehash_when_rounds_differ():
+    assert not needs_rehash(hash_pwd('madr'))
+    assert needs_rehash(hash_pwd('madr', rounds=4))
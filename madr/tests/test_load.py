@@ -0,0 +1,146 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from madr.database.models import Book, Novelists
+from madr.tools.load import NOVELISTS, main, write_rows
+
+
+def _run(database_path: Path, *args):
+    main([*map(str, args), '--database-url', f'sqlite:///{database_path}'])
+
+
+def test_load_novelists_from_csv(
+    session: Session, database_path: Path, tmp_path: Path, capsys
+):
+    session.add(Novelists(name='clarice lispector'))
+    session.commit()
+    path = tmp_path / 'romancistas.csv'
+    path.write_text(
+        'nome\nMachado de Assis\nClarice Lispector\nmachado de assis!\n'
+        'Lima Barreto\n'
+    )
+
+    with freeze_time('2024-05-01 12:00:00'):
+        _run(database_path, 'romancistas', path, '--batch-size', 2)
+
+    novelists = session.execute(
+        select(Novelists.name, Novelists.updated_at).order_by(Novelists.id)
+    )
+    assert novelists.all()[1:] == [
+        ('machado de assis', datetime(2024, 5, 1, 12)),
+        ('lima barreto', datetime(2024, 5, 1, 12)),
+    ]
+    output = capsys.readouterr().out
+    assert '4 lidos, 2 inseridos, 2 já existentes, 0 inválidos' in output
+    assert 'registros/s' in output
+
+
+def test_load_books_from_ndjson(
+    session: Session, database_path: Path, tmp_path: Path, capsys
+):
+    session.add(Novelists(name='machado de assis'))
+    session.commit()
+    records = [
+        {
+            'titulo': 'Dom Casmurro',
+            'ano': 1899,
+            'romancista': 'Machado de Assis',
+        },
+        {'titulo': 'A Hora da Estrela', 'ano': 1977, 'romancista': 'Clarice'},
+        {'titulo': 'Helena', 'ano': 1876, 'romancista_id': 1},
+        {'titulo': 'DOM CASMURRO', 'ano': 1899, 'romancista_id': 1},
+        {'titulo': 'Sem Autor', 'ano': 1900, 'romancista_id': 99},
+        {'titulo': 'Sem Ano', 'romancista_id': 1},
+    ]
+    path = tmp_path / 'livros.ndjson'
+    path.write_text(
+        '\n'.join(json.dumps(record) for record in records) + '\n{quebrado\n'
+    )
+
+    with pytest.raises(SystemExit) as exit:
+        _run(database_path, 'livros', path, '--batch-size', 2)
+
+    assert exit.value.code == 1
+    books = session.execute(
+        select(Book.title, Book.year, Book.author_id).order_by(Book.id)
+    )
+    assert books.all() == [
+        ('dom casmurro', '1899', 1),
+        ('a hora da estrela', '1977', 2),
+        ('helena', '1876', 1),
+    ]
+    assert session.scalar(select(Novelists.name).where(Novelists.id == 2)) == (
+        'clarice'
+    )
+    captured = capsys.readouterr()
+    assert '7 lidos, 3 inseridos, 1 já existentes, 3 inválidos' in captured.out
+    assert 'registro 5 ignorado: romancista 99 não encontrado' in captured.err
+
+
+class _Copy:
+    def __init__(self, cursor, statement):
+        self.cursor = cursor
+        cursor.statements.append(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def write_row(self, row):
+        self.cursor.rows.append(row)
+
+
+class _Cursor:
+    def __init__(self):
+        self.statements = []
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def copy(self, statement):
+        return _Copy(self, statement)
+
+
+class _PostgresConnection:
+    dialect = SimpleNamespace(name='postgresql')
+
+    def __init__(self):
+        self.cursor = _Cursor()
+        self.statements = []
+        self.connection = SimpleNamespace(
+            driver_connection=SimpleNamespace(cursor=lambda: self.cursor)
+        )
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        return SimpleNamespace(rowcount=len(self.cursor.rows))
+
+
+@freeze_time('2024-05-01 12:00:00')
+def test_copy_writes_updated_at_in_utc():
+    conn = _PostgresConnection()
+
+    created = write_rows(conn, NOVELISTS, ('name',), [('machado de assis',)])
+
+    assert created == 1
+    assert conn.cursor.statements == [
+        'COPY novelists_load (name, updated_at) FROM STDIN'
+    ]
+    assert conn.cursor.rows == [('machado de assis', datetime(2024, 5, 1, 12))]
+    assert conn.statements[-1] == (
+        'INSERT INTO novelists (name, updated_at) '
+        'SELECT name, updated_at FROM novelists_load ON CONFLICT DO NOTHING'
+    )
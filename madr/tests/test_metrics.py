@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+
+from madr.infra import config
+
+
+def _sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_metrics_per_route(client: TestClient):
+    route = 'method="GET",route="/livros/livro/{id}"'
+    before = _sample(
+        client.get('/metrics').text,
+        f'madr_http_responses_total{{{route},status="404"}}',
+    )
+    client.get('/livros/livro/0')
+    client.get('/livros/livro/0')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        _sample(
+            response.text, f'madr_http_responses_total{{{route},status="404"}}'
+        )
+        == before + 2
+    )
+    assert f'madr_http_request_duration_seconds_count{{{route}}}' in (
+        response.text
+    )
+    assert 'madr_http_requests_in_flight' in response.text
+    assert 'madr_db_pool_checked_out' in response.text
+    assert 'madr_threadpool_size' in response.text
+    assert 'madr_bcrypt_seconds_total' in response.text
+
+
+def test_metrics_group_unmatched_routes(client: TestClient):
+    client.get('/nao/existe/123')
+
+    response = client.get('/metrics')
+
+    assert 'route="unmatched",status="404"' in response.text
+    assert '/nao/existe/123' not in response.text
+
+
+def test_bcrypt_time_is_counted(client: TestClient, user):
+    name = 'madr_bcrypt_calls_total'
+    before = _sample(client.get('/metrics').text, name)
+    client.post(
+        '/contas/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert _sample(client.get('/metrics').text, name) == before + 1
+
+
+def test_threadpool_is_sampled_by_each_worker(client: TestClient):
+    response = client.get('/metrics')
+
+    assert _sample(response.text, 'madr_threadpool_size') == (
+        config.THREADPOOL_SIZE
+    )
+
+
+WORKER = """
+from madr.server.metrics import observe_request
+observe_request('GET', '/livros/livro/{id}', 404, 0.01)
+"""
+
+
+def test_metrics_sum_worker_files_in_multiprocess_mode(
+    client: TestClient, tmp_path, monkeypatch
+):
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, '-c', WORKER],
+            env=env,
+            cwd=config.BASE_URL,
+            check=True,
+        )
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+
+    response = client.get('/metrics')
+
+    route = 'method="GET",route="/livros/livro/{id}"'
+    assert response.status_code == HTTPStatus.OK
+    assert (
+        _sample(
+            response.text, f'madr_http_responses_total{{{route},status="404"}}'
+        )
+        == 2
+    )
+    assert (
+        _sample(
+            response.text,
+            f'madr_http_request_duration_seconds_count{{{route}}}',
+        )
+        == 2
+    )
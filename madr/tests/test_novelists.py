@@ -3,6 +3,14 @@ from urllib.parse import urlencode
 
 from fastapi.testclient import TestClient
 
+from madr.database.database import create_session_maker
+from madr.server.services.novelist_service import (
+    NovelistRecord,
+    get_novelist_service,
+    get_novelists_service,
+    novelist_cache,
+    novelist_search_cache,
+)
 from madr.tools.sanitize import sanitize_str
 
 
@@ -191,7 +199,7 @@ class TestGetNovelist:
         response = client.get(f'/romancistas/romancista?{filters}')
         assert response.status_code == HTTPStatus.OK
         res_json = response.json()
-        assert res_json == {'romancistas': []}
+        assert res_json == {'romancistas': [], 'next_cursor': None}
 
     def test_pagination_on_get_novelist_using_query(self, client, token: str):
         novelist = {'nome': 'Romancista'}
@@ -216,3 +224,223 @@ class TestGetNovelist:
         assert response.status_code == HTTPStatus.OK
 
         assert res_json_page_1['romancistas'] != res_json_page_2['romancistas']
+
+    def test_cursor_pagination_on_get_novelists(self, client, token: str):
+        for i in range(1, 26):
+            response = client.post(
+                '/romancistas/romancista',
+                json={'nome': f'Autor {i}'},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+            assert response.status_code == HTTPStatus.CREATED
+
+        filters = urlencode({'nome': 'autor'})
+        response = client.get(f'/romancistas/romancista?{filters}')
+        page_1 = response.json()
+        assert len(page_1['romancistas']) == 20
+        assert page_1['next_cursor']
+
+        filters = urlencode({'nome': 'autor', 'cursor': page_1['next_cursor']})
+        response = client.get(f'/romancistas/romancista?{filters}')
+        assert response.status_code == HTTPStatus.OK
+        page_2 = response.json()
+        assert len(page_2['romancistas']) == 5
+        assert page_2['next_cursor'] is None
+
+    def test_get_novelist_with_matching_etag(
+        self, client: TestClient, token: str
+    ):
+        response = client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Clarice Lispector'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        id = response.json()['id']
+        etag = client.get(f'/romancistas/romancista/{id}').headers['ETag']
+
+        response = client.get(
+            f'/romancistas/romancista/{id}', headers={'If-None-Match': etag}
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        client.patch(
+            f'/romancistas/romancista/{id}',
+            json={'nome': 'Clarice'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        response = client.get(
+            f'/romancistas/romancista/{id}', headers={'If-None-Match': etag}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        response = client.get(
+            '/romancistas/romancista?nome=clarice',
+            headers={'If-None-Match': response.headers['ETag']},
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(
+            '/romancistas/romancista?nome=clarice',
+            headers={'If-None-Match': response.headers['ETag']},
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_get_novelists_with_fields(self, client: TestClient, token: str):
+        response = client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Clarice Lispector'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        id = response.json()['id']
+
+        response = client.get('/romancistas/romancista?nome=clarice&campos=id')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'romancistas': [{'id': id}],
+            'next_cursor': None,
+        }
+        response = client.get(f'/romancistas/romancista/{id}?campos=nome')
+        assert response.json() == {'nome': 'clarice lispector'}
+        response = client.get(f'/romancistas/romancista/{id}?campos=')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_export_novelists(self, client: TestClient, token: str):
+        for name in ['Clarice Lispector', 'Machado de Assis']:
+            client.post(
+                '/romancistas/romancista',
+                json={'nome': name},
+                headers={'Authorization': f'Bearer {token}'},
+            )
+
+        response = client.get('/romancistas/export?nome=clarice')
+        assert response.status_code == HTTPStatus.OK
+        assert response.text == '{"nome":"clarice lispector","id":1}\n'
+        response = client.get('/romancistas/export?formato=csv&campos=nome')
+        assert response.text.splitlines() == [
+            'nome',
+            'clarice lispector',
+            'machado de assis',
+        ]
+
+    def test_bulk_create_novelists(self, client: TestClient, token: str):
+        headers = {'Authorization': f'Bearer {token}'}
+        client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Clarice Lispector'},
+            headers=headers,
+        )
+        body = (
+            '{"nome": "Machado de Assis"}\n'
+            '{"nome": "CLARICE LISPECTOR"}\n'
+            '{"nome": ""}\n'
+            '{"nome": "Lima Barreto"'
+        )
+
+        response = client.post(
+            '/romancistas/bulk', content=body, headers=headers
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        report = response.json()
+        assert (report['criados'], report['conflitos'], report['erros']) == (
+            1,
+            1,
+            2,
+        )
+        assert report['linhas'][0] == {
+            'linha': 1,
+            'status': 'criado',
+            'id': 2,
+            'detail': None,
+        }
+        response = client.get('/romancistas/romancista?nome=machado')
+        assert len(response.json()['romancistas']) == 1
+
+    def test_delete_novelist_drops_cached_books(
+        self, client: TestClient, token: str
+    ):
+        headers = {'Authorization': f'Bearer {token}'}
+        response = client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Machado de Assis'},
+            headers=headers,
+        )
+        novelist_id = response.json()['id']
+        response = client.post(
+            '/livros/livro',
+            json={
+                'ano': 1899,
+                'titulo': 'Dom Casmurro',
+                'romancista_id': novelist_id,
+            },
+            headers=headers,
+        )
+        book_id = response.json()['id']
+        client.get(f'/livros/livro/{book_id}')
+        client.get(f'/romancistas/romancista/{novelist_id}')
+
+        client.delete(
+            f'/romancistas/romancista/{novelist_id}', headers=headers
+        )
+
+        response = client.get(f'/romancistas/romancista/{novelist_id}')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(f'/livros/livro/{book_id}')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class TestNovelistRecords:
+    def _create(self, client: TestClient, token: str) -> int:
+        response = client.post(
+            '/romancistas/romancista',
+            json={'nome': 'Clarice Lispector'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        return response.json()['id']
+
+    def test_reads_return_records_with_pruned_columns(
+        self, client: TestClient, token: str, async_engine
+    ):
+        id = self._create(client, token)
+        session_maker = create_session_maker(async_engine)
+
+        async def read():
+            async with session_maker() as db:
+                novelist = await get_novelist_service(id, db, ())
+                page = await get_novelists_service(
+                    {'name': 'clarice'}, db, 1, None, ('name',)
+                )
+            return novelist, page
+
+        novelist, page = client.portal.call(read)
+
+        assert type(novelist) is NovelistRecord
+        assert novelist.id == id
+        assert novelist.name is None
+        [item] = page.items
+        assert type(item) is NovelistRecord
+        assert item.name == 'clarice lispector'
+
+    def test_caches_round_trip_records(
+        self, client: TestClient, token: str, async_engine
+    ):
+        id = self._create(client, token)
+        session_maker = create_session_maker(async_engine)
+
+        async def read():
+            async with session_maker() as db:
+                novelist = await get_novelist_service(id, db)
+                page = await get_novelists_service({'name': 'clarice'}, db)
+            key = await novelist_search_cache.key('clarice', {}, 1, None, None)
+            return (
+                novelist,
+                page,
+                await novelist_cache.get(id),
+                await novelist_search_cache.get(key),
+            )
+
+        novelist, page, cached, cached_page = client.portal.call(read)
+
+        assert type(cached) is NovelistRecord
+        assert cached == novelist
+        assert type(cached_page.items[0]) is NovelistRecord
+        assert cached_page == page
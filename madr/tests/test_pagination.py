@@ -0,0 +1,19 @@
+import pytest
+
+from madr.tools.pagination import (
+    InvalidCursorException,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == 42
+
+
+@pytest.mark.parametrize('cursor', ['invalido', 'e30', encode_cursor('a')])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(type(InvalidCursorException)):
+        decode_cursor(cursor)
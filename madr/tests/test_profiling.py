@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from madr.infra import config
+from madr.server import profiles
+
+
+@pytest.fixture()
+def admin(monkeypatch, user):
+    monkeypatch.setattr(config, 'AUTH_ADMIN_EMAILS', [user.email])
+    return user
+
+
+def test_admin_gets_html_profile(client: TestClient, admin, token: str):
+    response = client.get(
+        '/livros/livro/0',
+        headers={'Authorization': f'Bearer {token}', 'X-Profile': 'html'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/html')
+    assert response.headers['X-Profiled-Status'] == '404'
+
+
+def test_admin_gets_speedscope_profile(client: TestClient, admin, token: str):
+    response = client.get(
+        '/livros/livro?profile=speedscope',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'speedscope' in response.json()['$schema']
+    assert response.headers['X-Profiled-Status'] == '200'
+
+
+def test_profile_is_restricted_to_admins(
+    client: TestClient, token: str, monkeypatch
+):
+    monkeypatch.setattr(config, 'AUTH_ADMIN_EMAILS', ['admin@madr.com'])
+
+    response = client.get(
+        '/livros/livro/0',
+        headers={'Authorization': f'Bearer {token}', 'X-Profile': 'html'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert 'X-Profiled-Status' not in response.headers
+
+
+def test_sampled_requests_are_folded_per_route(
+    client: TestClient, monkeypatch
+):
+    monkeypatch.setattr(config, 'PROFILING_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(config, 'PROFILING_INTERVAL', 0.0001)
+
+    response = client.get('/livros/livro/0')
+    profiles.flush()
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    lines = profiles.path.read_text().splitlines()
+    assert any(line.startswith('GET /livros/livro/{id};') for line in lines)
+    assert all(int(line.rsplit(' ', 1)[1]) >= 0 for line in lines)
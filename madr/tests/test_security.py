@@ -1,5 +1,7 @@
+import json
 from datetime import datetime, timedelta
 
+import jwt
 import pytest
 
 from madr.infra import config
@@ -38,3 +40,37 @@ def test_jwt_token_invalid_encode():
     with pytest.raises(type(security.CredentialException)):
         token = 'ABC'
         security.get_payload_from_token(token)
+
+
+def write_keys(path, active_kid, keys):
+    path.write_text(json.dumps({'active_kid': active_kid, 'keys': keys}))
+
+
+def test_jwt_token_signed_with_active_kid(tmp_path, monkeypatch):
+    keys_file = tmp_path / 'keys.json'
+    write_keys(keys_file, 'k1', {'k1': 'first-secret-key-with-32-bytes!!'})
+    monkeypatch.setattr(config, 'AUTH_KEYS_FILE', keys_file)
+
+    token = security.create_access_token({'sub': 'madr'})
+    assert jwt.get_unverified_header(token)['kid'] == 'k1'
+    assert security.get_payload_from_token(token)['sub'] == 'madr'
+
+
+def test_jwt_token_key_rotation(tmp_path, monkeypatch):
+    keys_file = tmp_path / 'keys.json'
+    old = {'k1': 'first-secret-key-with-32-bytes!!'}
+    new = {'k2': 'second-secret-key-with-32-bytes!'}
+    write_keys(keys_file, 'k1', old)
+    monkeypatch.setattr(config, 'AUTH_KEYS_FILE', keys_file)
+    old_token = security.create_access_token({'sub': 'madr'})
+
+    write_keys(keys_file, 'k2', {**old, **new})
+    new_token = security.create_access_token({'sub': 'madr'})
+    assert jwt.get_unverified_header(new_token)['kid'] == 'k2'
+    assert security.get_payload_from_token(old_token)['sub'] == 'madr'
+    assert security.get_payload_from_token(new_token)['sub'] == 'madr'
+
+    write_keys(keys_file, 'k2', new)
+    with pytest.raises(type(security.CredentialException)):
+        security.get_payload_from_token(old_token)
+    assert security.get_payload_from_token(new_token)['sub'] == 'madr'
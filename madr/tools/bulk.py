@@ -0,0 +1,103 @@
+"""Bulk imports: NDJSON request bodies read and validated in batches.
+
+The body is consumed as it arrives, one line per record; each batch of
+valid records is handed to a service while the invalid lines are kept
+for the report with the reason they were refused.
+"""
+from dataclasses import dataclass
+from typing import AsyncIterator, Literal, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+S = TypeVar('S', bound=BaseModel)
+
+BulkStatus = Literal['criado', 'conflito', 'erro']
+
+BATCH_REFUSED = 'Lote recusado pelo banco, tente novamente'
+
+
+@dataclass(slots=True)
+class BulkResult:
+    line: int
+    status: BulkStatus
+    id: int | None = None
+    detail: str | None = None
+
+
+async def ndjson_lines(
+    chunks: AsyncIterator[bytes], max_bytes: int
+) -> AsyncIterator[tuple[int, bytes | None]]:
+    """Non-blank lines of a streamed body, with their line numbers.
+
+    A line longer than ``max_bytes`` is not kept: it comes out as
+    ``None`` and the rest of it is dropped up to the next newline, so
+    the memory held never exceeds one line plus one chunk.
+    """
+    pending = bytearray()
+    skipping = False
+    number = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b'\n', start)) != -1:
+            number += 1
+            if not skipping:
+                pending += chunk[start:end]
+            if skipping or len(pending) > max_bytes:
+                yield number, None
+            elif pending.strip():
+                yield number, bytes(pending)
+            pending.clear()
+            skipping = False
+            start = end + 1
+        if not skipping:
+            pending += chunk[start:]
+            if len(pending) > max_bytes:
+                pending.clear()
+                skipping = True
+    if skipping:
+        yield number + 1, None
+    elif pending.strip():
+        yield number + 1, bytes(pending)
+
+
+def describe(error: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(map(str, e["loc"]))}: {e["msg"]}' if e['loc'] else e['msg']
+        for e in error.errors(include_url=False)
+    )
+
+
+async def read_batches(
+    chunks: AsyncIterator[bytes],
+    schema: type[S],
+    size: int,
+    max_line_bytes: int,
+) -> AsyncIterator[tuple[list[tuple[int, S]], list[BulkResult]]]:
+    """Up to ``size`` valid records at a time, with the lines refused."""
+    rows: list[tuple[int, S]] = []
+    errors: list[BulkResult] = []
+    async for number, line in ndjson_lines(chunks, max_line_bytes):
+        if line is None:
+            detail = f'Linha maior que {max_line_bytes} bytes'
+            errors.append(BulkResult(number, 'erro', detail=detail))
+            continue
+        try:
+            rows.append((number, schema.model_validate_json(line)))
+        except ValidationError as e:
+            errors.append(BulkResult(number, 'erro', detail=describe(e)))
+        if len(rows) >= size:
+            yield rows, errors
+            rows, errors = [], []
+    if rows or errors:
+        yield rows, errors
+
+
+def bulk_report(results: list[BulkResult]) -> dict:
+    results.sort(key=lambda result: result.line)
+    statuses = [result.status for result in results]
+    return {
+        'criados': statuses.count('criado'),
+        'conflitos': statuses.count('conflito'),
+        'erros': statuses.count('erro'),
+        'linhas': results,
+    }
@@ -0,0 +1,404 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Any, Generic, Hashable, TypeVar
+
+from madr.infra import Configs, config
+from madr.infra.metrics import CACHE_ERRORS, CACHE_HITS, CACHE_MISSES
+from madr.tools.pagination import Page
+from madr.tools.redis import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a TTL.
+
+    ``maxsize`` bounds the number of entries; the least recently used one
+    is evicted first. Each entry may override the default ``ttl``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+    def hit(self):
+        self.hits += 1
+        CACHE_HITS.inc()
+
+    def miss(self):
+        self.misses += 1
+        CACHE_MISSES.inc()
+
+    def error(self):
+        self.errors += 1
+        CACHE_ERRORS.inc()
+
+
+class MemoryBackend:
+    """Cache backend kept in this process, on top of :class:`TTLCache`."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.stats = CacheStats()
+        self._cache = TTLCache(maxsize, ttl)
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._cache.get(key)
+        if value is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None):
+        self._cache.set(key, value, ttl)
+
+    async def set_if(
+        self,
+        key: str,
+        value: bytes,
+        counter_key: str,
+        expected: int,
+        ttl: float | None = None,
+    ):
+        if self._counters.get(counter_key, 0) == expected:
+            self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    async def counter(self, key: str) -> int | None:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str):
+        self._counters[key] = self._counters.get(key, 0) + 1
+
+    async def clear(self):
+        self._cache.clear()
+        self._counters.clear()
+
+    async def close(self):
+        pass
+
+
+# compares and sets atomically on the server
+SET_IF_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') == tonumber(ARGV[2]) then
+    return redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+end
+"""
+
+
+class RedisBackend:
+    """Cache backend shared by every worker through a Redis server.
+
+    A failing server never fails the request: reads count as misses and
+    writes are dropped, both counted in ``stats.errors``.
+    """
+
+    def __init__(self, client: RedisClient, ttl: float, prefix: str = ''):
+        self.stats = CacheStats()
+        self.client = client
+        self.ttl_ms = int(ttl * 1000)
+        self.prefix = prefix
+
+    async def _safe(self, *args):
+        try:
+            return await self.client.execute(*args)
+        except (OSError, EOFError, RedisError, asyncio.TimeoutError) as e:
+            self.stats.error()
+            logger.warning('Cache command %s failed: %r', args[0], e)
+            return None
+
+    async def get(self, key: str) -> bytes | None:
+        value = await self._safe('GET', self.prefix + key)
+        if value is None:
+            self.stats.miss()
+        else:
+            self.stats.hit()
+        return value
+
+    def _ttl_ms(self, ttl: float | None) -> int:
+        if ttl is None:
+            return self.ttl_ms
+        return min(int(ttl * 1000), self.ttl_ms)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None):
+        await self._safe(
+            'SET', self.prefix + key, value, 'PX', self._ttl_ms(ttl)
+        )
+
+    async def set_if(
+        self,
+        key: str,
+        value: bytes,
+        counter_key: str,
+        expected: int,
+        ttl: float | None = None,
+    ):
+        """``SET`` only while ``counter_key`` still holds ``expected``."""
+        await self._safe(
+            'EVAL',
+            SET_IF_SCRIPT,
+            2,
+            self.prefix + key,
+            self.prefix + counter_key,
+            value,
+            expected,
+            self._ttl_ms(ttl),
+        )
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._safe('DEL', *(self.prefix + key for key in keys))
+
+    async def counter(self, key: str) -> int | None:
+        """Current value of ``key``, ``None`` when the server failed."""
+        try:
+            value = await self.client.execute('GET', self.prefix + key)
+        except (OSError, EOFError, RedisError, asyncio.TimeoutError) as e:
+            self.stats.error()
+            logger.warning('Cache command GET failed: %r', e)
+            return None
+        return int(value or 0)
+
+    async def incr(self, key: str):
+        await self._safe('INCR', self.prefix + key)
+
+    async def clear(self):
+        cursor = '0'
+        while True:
+            reply = await self._safe(
+                'SCAN', cursor, 'MATCH', f'{self.prefix}*', 'COUNT', 1000
+            )
+            if reply is None:
+                return
+            cursor, keys = reply[0].decode(), reply[1]
+            if keys:
+                await self._safe('DEL', *keys)
+            if cursor == '0':
+                return
+
+    async def close(self):
+        await self.client.close()
+
+
+CacheBackend = MemoryBackend | RedisBackend
+
+
+def is_shared(config: Configs) -> bool:
+    """Whether every worker sees the same cache, and its invalidations."""
+    return config.CACHE_BACKEND == 'redis' or config.WEB_CONCURRENCY == 1
+
+
+def search_cache_ttl(config: Configs) -> float:
+    """Search pages are only cached where every worker sees the bumps."""
+    return config.CACHE_SEARCH_TTL_SECONDS if is_shared(config) else 0
+
+
+def create_backend(config: Configs) -> CacheBackend:
+    if not is_shared(config):
+        logger.warning(
+            'CACHE_BACKEND=memory with WEB_CONCURRENCY=%d: search pages '
+            'are not cached and records may be stale for up to %ds in '
+            'workers that did not handle a write, set CACHE_BACKEND=redis.',
+            config.WEB_CONCURRENCY,
+            config.CACHE_TTL_SECONDS,
+        )
+    if config.CACHE_BACKEND == 'redis':
+        return RedisBackend(
+            RedisClient(config.CACHE_URL, timeout=config.CACHE_TIMEOUT),
+            config.CACHE_TTL_SECONDS,
+            config.CACHE_PREFIX,
+        )
+    return MemoryBackend(config.CACHE_MAX_SIZE, config.CACHE_TTL_SECONDS)
+
+
+cache_backend = create_backend(config)
+
+R = TypeVar('R')
+
+
+class RecordCodec(Generic[R]):
+    """JSON for frozen dataclass records, so every backend holds bytes."""
+
+    def __init__(self, record_type: type[R]):
+        self.record_type = record_type
+        self._datetimes = [
+            f.name for f in fields(record_type) if f.type is datetime
+        ]
+
+    def dump(self, record: R) -> dict:
+        data = asdict(record)
+        for name in self._datetimes:
+            data[name] = data[name].isoformat()
+        return data
+
+    def load(self, data: dict) -> R:
+        for name in self._datetimes:
+            data[name] = datetime.fromisoformat(data[name])
+        return self.record_type(**data)
+
+
+class RecordCache(Generic[R]):
+    """Read-through cache of frozen dataclass records by id.
+
+    Every delete bumps a generation counter of the namespace before
+    dropping the keys. A reader takes the :meth:`generation` before its
+    query and :meth:`set` stores the record only if no delete happened
+    since, so a row read before a concurrent write is never cached after
+    the write invalidated it.
+    """
+
+    def __init__(self, namespace: str, record_type: type[R], backend):
+        self.namespace = namespace
+        self.codec = RecordCodec(record_type)
+        self.backend = backend
+
+    @property
+    def generation_key(self) -> str:
+        return f'{self.namespace}:generation'
+
+    def key(self, id: int) -> str:
+        return f'{self.namespace}:{id}'
+
+    async def generation(self) -> int | None:
+        return await self.backend.counter(self.generation_key)
+
+    async def get(self, id: int) -> R | None:
+        raw = await self.backend.get(self.key(id))
+        if raw is None:
+            return None
+        return self.codec.load(json.loads(raw))
+
+    async def set(self, record: R, generation: int | None):
+        if generation is None:
+            return
+        data = json.dumps(self.codec.dump(record))
+        await self.backend.set_if(
+            self.key(record.id),
+            data.encode(),
+            self.generation_key,
+            generation,
+        )
+
+    async def delete(self, *ids: int):
+        await self.backend.incr(self.generation_key)
+        await self.backend.delete(*(self.key(id) for id in ids))
+
+
+class SearchCache(Generic[R]):
+    """Pages of search results, invalidated by a generation counter.
+
+    Every key embeds the table generation read *before* the query runs;
+    a write only bumps the counter, which orphans all the pages cached
+    so far (they expire with their TTL). A page computed while a write
+    happened lands under the old generation and is never read.
+    """
+
+    def __init__(
+        self, namespace: str, record_type: type[R], backend, ttl: float
+    ):
+        self.namespace = namespace
+        self.codec = RecordCodec(record_type)
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def generation_key(self) -> str:
+        return f'{self.namespace}:generation'
+
+    async def key(self, *params) -> str | None:
+        if self.ttl <= 0:
+            return None
+        generation = await self.backend.counter(self.generation_key)
+        if generation is None:
+            return None
+        digest = hashlib.blake2b(
+            json.dumps(params, sort_keys=True, default=str).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f'{self.namespace}:{generation}:{digest}'
+
+    async def get(self, key: str | None) -> Page[R] | None:
+        if key is None:
+            return None
+        raw = await self.backend.get(key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return Page(
+            [self.codec.load(item) for item in data['items']],
+            data['next_cursor'],
+        )
+
+    async def set(self, key: str | None, page: Page[R]):
+        if key is None or self.ttl <= 0:
+            return
+        data = json.dumps(
+            {
+                'items': [self.codec.dump(item) for item in page.items],
+                'next_cursor': page.next_cursor,
+            }
+        )
+        await self.backend.set(key, data.encode(), self.ttl)
+
+    async def bump(self):
+        await self.backend.incr(self.generation_key)
@@ -0,0 +1,115 @@
+"""Streamed exports as NDJSON or CSV, one chunk per batch of records.
+
+Each record is validated by the response schema of the resource, so the
+exported fields and types match those of the JSON routes.
+"""
+import csv
+import io
+from typing import AsyncIterator, Literal
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
+
+from madr.infra import Configs, config
+
+ExportsBusyException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail='Muitas exportações em andamento, tente novamente',
+    headers={'Retry-After': '5'},
+)
+
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+async def ndjson_chunks(
+    batches: AsyncIterator[list], schema: type[BaseModel]
+) -> AsyncIterator[bytes]:
+    serializer = schema.__pydantic_serializer__
+    async for batch in batches:
+        yield b''.join(
+            serializer.to_json(
+                schema.model_validate(record, from_attributes=True),
+                by_alias=True,
+            )
+            + b'\n'
+            for record in batch
+        )
+
+
+async def csv_chunks(
+    batches: AsyncIterator[list], schema: type[BaseModel]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(
+        info.alias or name for name, info in schema.model_fields.items()
+    )
+    async for batch in batches:
+        for record in batch:
+            model = schema.model_validate(record, from_attributes=True)
+            writer.writerow(model.model_dump(mode='json').values())
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ExportLimiter:
+    """Exports streaming at once in this process.
+
+    Each export holds a pool connection until its last row is sent; past
+    ``EXPORT_MAX_CONCURRENT`` new exports are refused with a 503 instead
+    of taking the connections the other routes need.
+    """
+
+    def __init__(self, config: Configs):
+        self.config = config
+        self.active = 0
+
+    def acquire(self):
+        if self.active >= self.config.EXPORT_MAX_CONCURRENT:
+            raise ExportsBusyException
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+
+
+export_limiter = ExportLimiter(config)
+
+
+class ExportResponse(StreamingResponse):
+    """Gives the export slot back when the stream ends or is dropped."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            export_limiter.release()
+
+
+def export_response(
+    batches: AsyncIterator[list],
+    schema: type[BaseModel],
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    export_limiter.acquire()
+    chunks = csv_chunks if format == 'csv' else ndjson_chunks
+    return ExportResponse(
+        chunks(batches, schema),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{filename}.{format}"'
+            )
+        },
+    )
@@ -0,0 +1,55 @@
+"""Sparse fieldsets: ``?campos=titulo,ano`` trims a response to those fields.
+
+Each resource maps its public (JSON) field names to the attribute names
+of its records; the services select only the matching columns and the
+response is validated by a copy of its schema with just those fields.
+"""
+from functools import lru_cache
+from typing import Mapping, NamedTuple, get_args
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+InvalidFieldsException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Campo desconhecido em campos',
+)
+
+
+class Fieldset(NamedTuple):
+    names: tuple[str, ...]
+    attrs: tuple[str, ...]
+
+
+def parse_fields(
+    value: str | None, fields: Mapping[str, str]
+) -> Fieldset | None:
+    """The fields listed in ``value``, in the order of ``fields``."""
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(',')} - {''}
+    if not requested or not requested <= fields.keys():
+        raise InvalidFieldsException
+    names = tuple(name for name in fields if name in requested)
+    return Fieldset(names, tuple(fields[name] for name in names))
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(
+    schema: type[BaseModel], names: tuple[str, ...], items: str | None = None
+) -> type[BaseModel]:
+    """Copy of ``schema`` with only the fields aliased as ``names``.
+
+    With ``items`` the fields of ``schema`` are kept and the item schema
+    of its ``items`` list is the one trimmed, for pages.
+    """
+    definitions = {}
+    for name, info in schema.model_fields.items():
+        if name == items:
+            (item,) = get_args(info.annotation)
+            definitions[name] = (list[sparse_schema(item, names)], info)
+        elif items or (info.alias or name) in names:
+            definitions[name] = (info.annotation, info)
+    return create_model(
+        schema.__name__, __config__=schema.model_config, **definitions
+    )
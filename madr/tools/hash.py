@@ -1,12 +1,33 @@
+import asyncio
 import re
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
 
 import bcrypt
+from fastapi import HTTPException, status
 
 from madr.infra import config
+from madr.infra.metrics import (
+    BCRYPT_CALLS,
+    BCRYPT_PENDING,
+    BCRYPT_REJECTED,
+    BCRYPT_SECONDS,
+)
 
+HashPoolSaturatedException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail='Serviço de autenticação sobrecarregado, tente novamente',
+    headers={'Retry-After': '1'},
+)
 
-def hash_pwd(pwd: str) -> str:
-    return bcrypt.hashpw(pwd.encode(), config.AUTH_SALT.encode()).decode()
+
+HASH_PATTERN = re.compile(r'^\$2[aby]?\$(?P<rounds>[0-9]{2})\$.{53}$')
+
+
+def hash_pwd(pwd: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or config.AUTH_BCRYPT_ROUNDS)
+    return bcrypt.hashpw(pwd.encode(), salt).decode()
 
 
 def check_pwd(pwd: str, hashed_pwd: str) -> bool:
@@ -14,5 +35,91 @@ def check_pwd(pwd: str, hashed_pwd: str) -> bool:
 
 
 def is_hashed_pwd(pwd: str):
-    pattern = r'^\$2[aby]?\$[0-9]{2}\$.{53}$'
-    return bool(re.match(pattern, pwd))
+    return bool(HASH_PATTERN.match(pwd))
+
+
+def get_hash_rounds(hashed_pwd: str) -> int | None:
+    match = HASH_PATTERN.match(hashed_pwd)
+    if not match:
+        return None
+    return int(match.group('rounds'))
+
+
+def needs_rehash(hashed_pwd: str) -> bool:
+    return get_hash_rounds(hashed_pwd) != config.AUTH_BCRYPT_ROUNDS
+
+
+@dataclass
+class HashPoolStats:
+    workers: int
+    max_pending: int
+    pending: int = 0
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.workers)
+
+
+class HashPool:
+    """Process pool that keeps bcrypt off the event loop and its threads.
+
+    ``pending`` counts calls submitted and not finished yet; once it
+    reaches ``max_pending`` new calls are refused with a 503 instead of
+    piling up behind a burst of logins.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor: Executor | None = None
+        self.stats = HashPoolStats(workers=workers, max_pending=max_pending)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.stats.workers
+            )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.stats.pending >= self.stats.max_pending:
+            self.stats.rejected += 1
+            BCRYPT_REJECTED.inc()
+            raise HashPoolSaturatedException
+        self.stats.pending += 1
+        self.stats.submitted += 1
+        BCRYPT_PENDING.inc()
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.busy_seconds += elapsed
+            self.stats.pending -= 1
+            self.stats.completed += 1
+            BCRYPT_PENDING.dec()
+            BCRYPT_SECONDS.inc(elapsed)
+            BCRYPT_CALLS.inc()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_pool = HashPool(
+    workers=config.HASH_POOL_WORKERS,
+    max_pending=config.HASH_POOL_MAX_PENDING,
+)
+
+
+async def async_hash_pwd(pwd: str) -> str:
+    return await hash_pool.run(hash_pwd, pwd, config.AUTH_BCRYPT_ROUNDS)
+
+
+async def async_check_pwd(pwd: str, hashed_pwd: str) -> bool:
+    return await hash_pool.run(check_pwd, pwd, hashed_pwd)
@@ -0,0 +1,86 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from fastapi import Request, Response, status
+
+from madr.infra import config
+from madr.tools.pagination import Page
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(
+        '|'.join(map(str, parts)).encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def record_etag(id: int, updated_at: datetime, variant: str = '') -> str:
+    return make_etag(id, updated_at.isoformat(), variant)
+
+
+def list_etag(
+    versions: Iterable[tuple[int, datetime]], variant: str = ''
+) -> str:
+    """ETag of a page, from the ``(id, updated_at)`` of its items."""
+    return make_etag(
+        variant,
+        *(f'{id}@{updated_at.isoformat()}' for id, updated_at in versions),
+    )
+
+
+def page_etag(request: Request, page: Page) -> str:
+    """ETag of a listed page; the query string tells the variants apart."""
+    return list_etag(
+        ((item.id, item.updated_at) for item in page.items),
+        f'{request.url.query}|{page.next_cursor}',
+    )
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def cache_headers(
+    etag: str, last_modified: datetime | None = None
+) -> dict[str, str]:
+    headers = {'ETag': etag, 'Cache-Control': config.HTTP_CACHE_CONTROL}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return (
+        'if-none-match' in request.headers
+        or 'if-modified-since' in request.headers
+    )
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """RFC 9110 validation: ``If-None-Match`` wins over the date."""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {
+            tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+        }
+        return '*' in tags or etag in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return modified <= since
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,323 @@
+"""Offline bulk load of novelists and books from CSV or NDJSON files.
+
+python -m madr.tools.load romancistas romancistas.csv
+python -m madr.tools.load livros livros.ndjson --batch-size 50000
+
+The files use the fields of the API: ``nome`` for novelists; ``titulo``,
+``ano`` and ``romancista`` (a name, created when missing) or
+``romancista_id`` for books. On Postgres every batch is sent with
+``COPY ... FROM STDIN`` to a temporary table and moved with ``INSERT ...
+SELECT ... ON CONFLICT DO NOTHING``; other databases get a batched
+``executemany`` of the same insert. Either way titles and names already
+in the MADR, or repeated in the files, are skipped as the unique
+constraints demand, and every batch is committed on its own.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import Connection, Engine, Table, create_engine, select, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import InstrumentedAttribute
+
+from madr.database.models import Book, Novelists, utcnow
+from madr.infra import config
+from madr.server.services.book_service import book_search_cache
+from madr.server.services.novelist_service import novelist_search_cache
+from madr.tools.cache import cache_backend
+from madr.tools.sanitize import sanitize_str
+
+BOOKS: Table = Book.__table__
+NOVELISTS: Table = Novelists.__table__
+
+# keeps ``IN`` lists under the bound parameter limit of SQLite
+LOOKUP_SIZE = 1000
+
+MAX_REPORTED_ERRORS = 10
+
+
+@dataclass
+class LoadStats:
+    read: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    @property
+    def skipped(self) -> int:
+        return self.read - self.inserted - self.rejected
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: Path) -> Iterator[dict | str]:
+    """CSV rows as dicts; NDJSON lines still encoded, to fail one by one."""
+    with path.open(newline='', encoding='utf-8') as file:
+        if path.suffix.lower() == '.csv':
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield line
+
+
+def copy_rows(
+    conn: Connection, table: Table, columns: tuple[str, ...], rows: list
+) -> int:
+    """``COPY`` ``rows`` to a staging table, then insert the new ones."""
+    staging = f'{table.name}_load'
+    names = ', '.join(columns)
+    conn.execute(
+        text(
+            f'CREATE TEMP TABLE IF NOT EXISTS {staging} '
+            f'ON COMMIT DELETE ROWS '
+            f'AS SELECT {names} FROM {table.name} WITH NO DATA'
+        )
+    )
+    cursor = conn.connection.driver_connection.cursor()
+    with cursor, cursor.copy(f'COPY {staging} ({names}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+    result = conn.execute(
+        text(
+            f'INSERT INTO {table.name} ({names}) '
+            f'SELECT {names} FROM {staging} ON CONFLICT DO NOTHING'
+        )
+    )
+    return result.rowcount
+
+
+def insert_rows(
+    conn: Connection, table: Table, columns: tuple[str, ...], rows: list
+) -> int:
+    result = conn.execute(
+        sqlite.insert(table).on_conflict_do_nothing(),
+        [dict(zip(columns, row)) for row in rows],
+    )
+    return result.rowcount
+
+
+def write_rows(
+    conn: Connection, table: Table, columns: tuple[str, ...], rows: list
+) -> int:
+    """Insert the new ``rows``, stamped with ``updated_at`` in naive UTC.
+
+    The stamp is explicit, as the ORM writes it: the server default would
+    use the session time zone of Postgres.
+    """
+    if not rows:
+        return 0
+    now = utcnow()
+    columns = (*columns, 'updated_at')
+    rows = [(*row, now) for row in rows]
+    if conn.dialect.name == 'postgresql':
+        return copy_rows(conn, table, columns, rows)
+    return insert_rows(conn, table, columns, rows)
+
+
+def lookup_ids(
+    conn: Connection, column: InstrumentedAttribute, values: Iterable
+) -> dict:
+    """``{value: id}`` of the novelists whose ``column`` is in ``values``."""
+    values = list(values)
+    ids = {}
+    for start in range(0, len(values), LOOKUP_SIZE):
+        chunk = values[start : start + LOOKUP_SIZE]
+        ids.update(
+            conn.execute(
+                select(column, Novelists.id).where(column.in_(chunk))
+            ).all()
+        )
+    return ids
+
+
+class NovelistIds:
+    """Ids of the novelists a batch refers to, creating the missing names.
+
+    Only the names and ids of the batch at hand are looked up, so memory
+    stays flat however many novelists the MADR has.
+    """
+
+    def __init__(self):
+        self.by_name: dict[str, int] = {}
+        self.ids: set[int] = set()
+
+    def resolve(
+        self,
+        conn: Connection,
+        names: Iterable[str],
+        ids: Iterable[int] = (),
+    ) -> int:
+        names = set(names)
+        self.by_name = lookup_ids(conn, Novelists.name, names)
+        missing = sorted(names - self.by_name.keys())
+        created = write_rows(
+            conn, NOVELISTS, ('name',), [(name,) for name in missing]
+        )
+        self.by_name.update(lookup_ids(conn, Novelists.name, missing))
+        self.ids = set(self.by_name.values())
+        self.ids.update(lookup_ids(conn, Novelists.id, set(ids)))
+        return created
+
+
+def parse_novelist(record: dict) -> tuple[str]:
+    name = sanitize_str(record['nome'])
+    if not name:
+        raise ValueError('nome vazio')
+    return (name,)
+
+
+def parse_book(record: dict) -> tuple[str, str, str | int]:
+    title = sanitize_str(record['titulo'])
+    if not title:
+        raise ValueError('titulo vazio')
+    year = str(int(record['ano']))
+    if 'romancista' in record:
+        author = sanitize_str(record['romancista'])
+        if not author:
+            raise ValueError('romancista vazio')
+        return title, year, author
+    return title, year, int(record['romancista_id'])
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Loader:
+    def __init__(self, conn: Connection, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.novelists = NovelistIds()
+        self.errors = 0
+
+    def _parse(
+        self, path: Path, parse: Callable[[dict], tuple], stats: LoadStats
+    ) -> Iterator[tuple[int, tuple]]:
+        for number, record in enumerate(read_records(path), 1):
+            stats.read += 1
+            try:
+                if isinstance(record, str):
+                    record = json.loads(record)
+                yield number, parse(record)
+            except (KeyError, TypeError, ValueError) as e:
+                self._reject(path, number, repr(e), stats)
+
+    def _reject(self, path: Path, number: int, reason: str, stats: LoadStats):
+        stats.rejected += 1
+        self.errors += 1
+        if self.errors <= MAX_REPORTED_ERRORS:
+            print(
+                f'{path}: registro {number} ignorado: {reason}',
+                file=sys.stderr,
+            )
+
+    def load_novelists(self, path: Path) -> LoadStats:
+        stats = LoadStats()
+        start = time.perf_counter()
+        rows = self._parse(path, parse_novelist, stats)
+        for batch in batched(rows, self.batch_size):
+            stats.inserted += self.novelists.resolve(
+                self.conn, (name for _, (name,) in batch)
+            )
+            self.conn.commit()
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def load_books(self, path: Path) -> LoadStats:
+        stats = LoadStats()
+        start = time.perf_counter()
+        rows = self._parse(path, parse_book, stats)
+        for batch in batched(rows, self.batch_size):
+            authors = [author for _, (_, _, author) in batch]
+            self.novelists.resolve(
+                self.conn,
+                (author for author in authors if isinstance(author, str)),
+                (author for author in authors if isinstance(author, int)),
+            )
+            ready = []
+            for number, (title, year, author) in batch:
+                author_id = self.novelists.by_name.get(author, author)
+                if author_id in self.novelists.ids:
+                    ready.append((title, year, author_id))
+                else:
+                    reason = f'romancista {author} não encontrado'
+                    self._reject(path, number, reason, stats)
+            stats.inserted += write_rows(
+                self.conn, BOOKS, ('title', 'year', 'author_id'), ready
+            )
+            self.conn.commit()
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+
+async def _bump_search_caches():
+    """New rows must show up in the searches cached by the workers."""
+    await book_search_cache.bump()
+    await novelist_search_cache.bump()
+    await cache_backend.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m madr.tools.load',
+        description='Carga em massa de romancistas ou livros.',
+    )
+    parser.add_argument('kind', choices=['romancistas', 'livros'])
+    parser.add_argument('files', nargs='+', type=Path)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument(
+        '--database-url',
+        default=config.DATABASE_URL,
+        help='Banco de destino; por padrão o DATABASE_URL da configuração.',
+    )
+    return parser
+
+
+def load(
+    engine: Engine, kind: str, files: list[Path], batch_size: int
+) -> list[LoadStats]:
+    results = []
+    with engine.connect() as conn:
+        loader = Loader(conn, batch_size)
+        for path in files:
+            if kind == 'livros':
+                stats = loader.load_books(path)
+            else:
+                stats = loader.load_novelists(path)
+            print(
+                f'{path}: {stats.read} lidos, {stats.inserted} inseridos, '
+                f'{stats.skipped} já existentes, {stats.rejected} inválidos '
+                f'em {stats.seconds:.1f}s '
+                f'({stats.rows_per_second:.0f} registros/s)'
+            )
+            results.append(stats)
+    return results
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    engine = create_engine(args.database_url)
+    try:
+        results = load(engine, args.kind, args.files, args.batch_size)
+    finally:
+        engine.dispose()
+    if config.CACHE_BACKEND == 'redis':
+        asyncio.run(_bump_search_caches())
+    if any(stats.rejected for stats in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+PAGE_SIZE = 20
+
+T = TypeVar('T')
+
+InvalidCursorException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail='Cursor de paginação inválido',
+)
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(last_key: int) -> str:
+    raw = json.dumps({'k': last_key}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        last_key = json.loads(raw)['k']
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorException from e
+    if not isinstance(last_key, int) or isinstance(last_key, bool):
+        raise InvalidCursorException
+    return last_key
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    key: InstrumentedAttribute,
+    page: int = 1,
+    cursor: str | None = None,
+    size: int = PAGE_SIZE,
+    rows: bool = False,
+) -> Page:
+    """Page ``query`` ordered by ``key``.
+
+    With a ``cursor`` the page starts right after the key it encodes
+    (keyset pagination, constant cost at any depth); otherwise ``page``
+    falls back to ``OFFSET``. One extra row is fetched to know whether a
+    ``next_cursor`` exists. With ``rows`` the ``Row`` tuples of a select
+    of columns are returned instead of the first column of each row.
+    """
+    query = query.order_by(key).limit(size + 1)
+    if cursor:
+        query = query.where(key > decode_cursor(cursor))
+    else:
+        query = query.offset((page - 1) * size)
+
+    result = await db.execute(query)
+    items = list(result.all() if rows else result.scalars().all())
+    if len(items) <= size:
+        return Page(items)
+    items = items[:size]
+    return Page(items, encode_cursor(getattr(items[-1], key.key)))
@@ -0,0 +1,104 @@
+"""Minimal asyncio client for the Redis protocol (RESP2).
+
+Only what the cache needs: a small connection pool and one command at a
+time per connection. Works with Redis, Valkey, KeyDB and the like.
+"""
+import asyncio
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    pass
+
+
+def encode_command(*args) -> bytes:
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed by the server')
+    kind, data = line[:1], line[1:-2]
+    if kind == b'+':
+        return data.decode()
+    if kind == b'-':
+        raise RedisError(data.decode())
+    if kind == b':':
+        return int(data)
+    if kind == b'$':
+        size = int(data)
+        if size == -1:
+            return None
+        return (await reader.readexactly(size + 2))[:-2]
+    if kind == b'*':
+        size = int(data)
+        if size == -1:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise RedisError(f'Unknown reply type {kind!r}')
+
+
+class RedisClient:
+    def __init__(self, url: str, max_idle: int = 10, timeout: float = 0.1):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: list[
+            tuple[asyncio.StreamReader, asyncio.StreamWriter]
+        ] = []
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._call(reader, writer, 'AUTH', self.password)
+        if self.db:
+            await self._call(reader, writer, 'SELECT', self.db)
+        return reader, writer
+
+    @staticmethod
+    async def _call(reader, writer, *args):
+        writer.write(encode_command(*args))
+        await writer.drain()
+        return await read_reply(reader)
+
+    async def execute(self, *args):
+        """Run one command; connection errors close the connection."""
+        return await asyncio.wait_for(self._execute(*args), self.timeout)
+
+    async def _execute(self, *args):
+        reader, writer = (
+            self._idle.pop() if self._idle else await self._connect()
+        )
+        try:
+            reply = await self._call(reader, writer, *args)
+        except RedisError:
+            self._release(reader, writer)
+            raise
+        except BaseException:
+            writer.close()
+            raise
+        self._release(reader, writer)
+        return reply
+
+    def _release(self, reader, writer):
+        if len(self._idle) < self.max_idle:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
@@ -1,7 +1,9 @@
 import string
 from unicodedata import normalize
 
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
 
 def sanitize_str(input_str: str):
     sanitized = ' '.join(normalize('NFKC', input_str).split()).lower()
-    return sanitized.translate(str.maketrans('', '', string.punctuation))
+    return sanitized.translate(PUNCTUATION_TABLE)
@@ -1,4 +1,9 @@
+import json
+import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
 
 import jwt
 from fastapi import HTTPException, status
@@ -12,6 +17,55 @@ CredentialException = HTTPException(
     headers={'WWW-Authenticate': 'Bearer'},
 )
 
+DEFAULT_KID = 'default'
+
+
+@dataclass(frozen=True)
+class KeyRing:
+    """Signing keys shared by every worker.
+
+    Tokens are signed with ``active_kid`` and carry it in the ``kid``
+    header; any key still listed in ``keys`` is accepted on decode, so a
+    key can be rotated without invalidating tokens already issued.
+    """
+
+    active_kid: str
+    keys: dict[str, str]
+
+    @property
+    def signing_key(self) -> str:
+        return self.keys[self.active_kid]
+
+    def verification_key(self, kid: str | None) -> str:
+        key = self.keys.get(kid or self.active_kid)
+        if key is None:
+            raise CredentialException
+        return key
+
+
+@lru_cache(maxsize=4)
+def _load_keyring(path: Path, mtime_ns: int, size: int) -> KeyRing:
+    data = json.loads(path.read_text(encoding='utf-8'))
+    keys = {str(kid): str(key) for kid, key in data['keys'].items()}
+    active_kid = str(data['active_kid'])
+    if active_kid not in keys:
+        raise ValueError(f'Active key {active_kid!r} not found in {path}')
+    return KeyRing(active_kid=active_kid, keys=keys)
+
+
+def get_keyring() -> KeyRing:
+    """Keys from ``AUTH_KEYS_FILE``, reloaded only when the file changes.
+
+    The file is JSON like ``{"active_kid": "k2", "keys": {"k1": "...",
+    "k2": "..."}}``. Without it the single ``AUTH_SECRET_KEY`` is used.
+    """
+    if not config.AUTH_KEYS_FILE:
+        return KeyRing(DEFAULT_KID, {DEFAULT_KID: config.AUTH_SECRET_KEY})
+    stat = os.stat(config.AUTH_KEYS_FILE)
+    return _load_keyring(
+        Path(config.AUTH_KEYS_FILE), stat.st_mtime_ns, stat.st_size
+    )
+
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -19,8 +73,12 @@ def create_access_token(data: dict):
         minutes=config.AUTH_JWT_EXPIRES_MINUTES
     )
     to_encode.update({'exp': expire})
+    keyring = get_keyring()
     return jwt.encode(
-        to_encode, config.AUTH_SECRET_KEY, algorithm=config.AUTH_ALGORITHM
+        to_encode,
+        keyring.signing_key,
+        algorithm=config.AUTH_ALGORITHM,
+        headers={'kid': keyring.active_kid},
     )
 
 
@@ -28,8 +86,11 @@ def get_payload_from_token(token: str):
     if not token:
         raise CredentialException
     try:
+        kid = jwt.get_unverified_header(token).get('kid')
         payload: dict = jwt.decode(
-            token, config.AUTH_SECRET_KEY, algorithms=[config.AUTH_ALGORITHM]
+            token,
+            get_keyring().verification_key(kid),
+            algorithms=[config.AUTH_ALGORITHM],
         )
         p = payload.copy()
         p.pop('exp')